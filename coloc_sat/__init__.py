@@ -8,6 +8,31 @@ import struct
 import socket
 import fcntl
 import os
+import importlib
+
+# Main classes, reachable from the package (`coloc_sat.GenerateColoc`, ...). Their modules (and xarray, numba, ...)
+# are only imported on first access, so that `import coloc_sat` stays cheap.
+_lazy_attributes = {
+    "GenerateColoc": "generate_coloc",
+    "ProductIntersection": "intersection",
+    "GetSarMeta": "sar_meta",
+    "GetSmosMeta": "smos_meta",
+    "GetEra5Meta": "era5_meta",
+    "GetHy2Meta": "hy2_meta",
+    "GetSmapMeta": "smap_meta",
+    "GetWindSatMeta": "windsat_meta",
+}
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        module = importlib.import_module(f".{_lazy_attributes[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_attributes))
 
 
 def get_ip_address(ifname):
@@ -114,7 +114,8 @@ def thismodule(): return sys.modules[__name__]
 
 def unpack(stream, shape, dtype):
     count = reduce(mul, shape)
-    return np.fromstring(stream, dtype=dtype, count=count).reshape(shape)
+    # read-only view on the decompressed bytes (no copy), the variables are copied when they are decoded
+    return np.frombuffer(stream, dtype=dtype, count=count).reshape(shape)
 
 
 """ Library of Methods for _get_ Functions: """
@@ -1,5 +1,7 @@
 import os
-from .tools import open_nc, correct_dataset, parse_date, common_var_names
+import functools
+import numpy as np
+from .tools import open_nc, correct_dataset, common_var_names, downcast_float64
 
 
 class GetEra5Meta:
@@ -7,7 +9,12 @@ class GetEra5Meta:
         self.product_path = product_path
         self.product_name = os.path.basename(self.product_path)
         self.product_generation = product_generation
+        # date of the product (%Y%m%d), parsed once from the product path and kept at the ISO format (%Y-%m-%d)
+        date_token = self.product_path.split("_")[-1].split(".")[0]
+        self._day_iso = f"{date_token[:4]}-{date_token[4:6]}-{date_token[6:8]}"
         self._dataset = None
+        # names of the longitude / latitude dimensions by resolution, memoized by `self._dim_name_res`
+        self._dim_names = {}
         # These attributes will be defined when the dataset will be reformatted for the coloc product generation
         # (see self.reformat_meta)
         self._longitude_name = None
@@ -16,21 +23,22 @@ class GetEra5Meta:
             self._footprint = footprint
 
         if self.product_generation:
-            self._dataset = open_nc(product_path).load()
+            # lazy dask arrays (one chunk for the 24 hours of the day): the data are only read when they are needed
+            self._dataset = open_nc(product_path, chunks={self.time_name: 24})
             self.dataset = correct_dataset(
-                self.dataset, lon_name=self.longitude_name_res(0.25)
-            )
-            self.dataset = correct_dataset(
-                self.dataset, lon_name=self.longitude_name_res(0.5)
+                self.dataset,
+                lon_name=[self.longitude_name_res(0.25), self.longitude_name_res(0.5)],
             )
             self.reformat_meta()
+            # float32 is enough for the model fields, and halves the memory used by the co-location
+            self.dataset = downcast_float64(self.dataset)
 
     @property
     def footprint(self):
         if hasattr(self, "_footprint"):
             return self._footprint
 
-    @property
+    @functools.cached_property
     def start_date(self):
         """
         Start acquisition time
@@ -41,10 +49,9 @@ class GetEra5Meta:
             Start time
         """
         # first time is at 00:00:00
-        str_time = self.product_path.split("_")[-1].split(".")[0] + "000000"
-        return parse_date(str_time)
+        return np.datetime64(f"{self._day_iso}T00:00:00", "us")
 
-    @property
+    @functools.cached_property
     def stop_date(self):
         """
         Stop acquisition time
@@ -55,8 +62,38 @@ class GetEra5Meta:
             Stop time
         """
         # last time is at 23:00:00
-        str_time = self.product_path.split("_")[-1].split(".")[0] + "230000"
-        return parse_date(str_time)
+        return np.datetime64(f"{self._day_iso}T23:00:00", "us")
+
+    def _dim_name_res(self, prefix, resolution):
+        """
+        Get the name of a dimension at a given resolution (ex: `longitude025`). Names are checked against the
+        dataset dimensions once, then memoized.
+
+        Parameters
+        ----------
+        prefix: str
+            Prefix of the dimension name (`longitude` or `latitude`)
+        resolution: float
+            Specified resolution for the dimension
+
+        Returns
+        -------
+        str
+            dimension name
+        """
+        key = (prefix, resolution)
+        if key not in self._dim_names:
+            str_resolution = str(resolution).replace(".", "")
+            str_resolution += "0" * (
+                3 - len(str_resolution)
+            )  # Add 0 to have a str of 3 characters
+            name = f"{prefix}{str_resolution}"
+            if name not in self.dataset.dims:
+                raise ValueError(
+                    f"{name} wasn't found in the dataset. Please verify the resolution is correct"
+                )
+            self._dim_names[key] = name
+        return self._dim_names[key]
 
     def longitude_name_res(self, resolution):
         """
@@ -74,17 +111,7 @@ class GetEra5Meta:
         str
             longitude name
         """
-        str_resolution = str(resolution).replace(".", "")
-        str_resolution += "0" * (
-            3 - len(str_resolution)
-        )  # Add 0 to have a str of 3 characters
-        name = f"longitude{str_resolution}"
-        if name in self.dataset.dims:
-            return name
-        else:
-            raise ValueError(
-                f"{name} wasn't found in the dataset. Please verify the resolution is correct"
-            )
+        return self._dim_name_res("longitude", resolution)
 
     def latitude_name_res(self, resolution):
         """
@@ -102,17 +129,7 @@ class GetEra5Meta:
         str
             longitude name
         """
-        str_resolution = str(resolution).replace(".", "")
-        str_resolution += "0" * (
-            3 - len(str_resolution)
-        )  # Add 0 to have a str of 3 characters
-        name = f"latitude{str_resolution}"
-        if name in self.dataset.dims:
-            return name
-        else:
-            raise ValueError(
-                f"{name} wasn't found in the dataset. Please verify the resolution is correct"
-            )
+        return self._dim_name_res("latitude", resolution)
 
     @property
     def time_name(self):
@@ -126,7 +143,7 @@ class GetEra5Meta:
         """
         return "time"
 
-    @property
+    @functools.cached_property
     def acquisition_type(self):
         """
         Gives the acquisition type (swath, truncated_swath,daily_regular_grid, model_regular_grid)
@@ -163,7 +180,7 @@ class GetEra5Meta:
         """
         self._dataset = value
 
-    @property
+    @functools.cached_property
     def orbit_segment_name(self):
         """
         Gives the name of the variable for orbit segmentation in dataset (Ascending / Descending). If value is None,
@@ -176,7 +193,7 @@ class GetEra5Meta:
         """
         return None
 
-    @property
+    @functools.cached_property
     def has_orbited_segmentation(self):
         """
         True if there is orbit segmentation in the dataset
@@ -186,12 +203,9 @@ class GetEra5Meta:
         bool
             Presence or not of an orbit segmentation
         """
-        if self.orbit_segment_name is not None:
-            return True
-        else:
-            return False
+        return self.orbit_segment_name is not None
 
-    @property
+    @functools.cached_property
     def mission_name(self):
         """
         Name of the mission (or model)
@@ -203,7 +217,7 @@ class GetEra5Meta:
         """
         return "ECMWF Reanalysis v5"
 
-    @property
+    @functools.cached_property
     def wind_name(self):
         """
         Name of an important wind variable in the dataset
@@ -308,13 +322,13 @@ class GetEra5Meta:
             self.wind_name: "wind_direction",
             "u10": "wind_speed",
         }
-        for var in dataset.variables:
-            if var in mapper.keys():
-                key_in_common_vars = mapper[var]
-                dataset = dataset.rename_vars(
-                    {var: common_var_names[key_in_common_vars]}
-                )
-        return dataset
+        # single rename of all the mapped variables (a rename per variable builds a new dataset each time)
+        rename_map = {
+            var: common_var_names[key_in_common_vars]
+            for var, key_in_common_vars in mapper.items()
+            if var in dataset.variables
+        }
+        return dataset.rename_vars(rename_map)
 
     @property
     def unecessary_vars_in_coloc_product(self):
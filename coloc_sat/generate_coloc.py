@@ -1,10 +1,14 @@
+import os
 import os.path
 import logging
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from .tools import (
     call_meta_class,
     get_all_comparison_files,
     extract_name_from_meta_class,
     set_config,
+    _max_workers,
 )
 from .intersection import ProductIntersection
 from .sar_meta import GetSarMeta
@@ -14,6 +18,24 @@ import pandas as pd
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=32)
+def _td_minutes(minutes):
+    """
+    Get a duration in minutes as a `numpy.timedelta64`, built once per value
+
+    Parameters
+    ----------
+    minutes: int
+        Duration in minutes
+
+    Returns
+    -------
+    numpy.timedelta64
+        Duration
+    """
+    return np.timedelta64(minutes, "m")
+
+
 class GenerateColoc:
     """
     Class that generates co-locations. It can create listings of co-located products and/or generate co-location products.
@@ -31,8 +53,8 @@ class GenerateColoc:
         Folder path where listing and / or co-location products will be created
     delta_time : int
         Maximum time (in minutes) that can separate two product acquisitions.
-    minimal_area : int | str
-        Minimal intersection area restricted for a valid co-location. If it is an integer, so it is expressed in
+    minimal_area : int | float | str
+        Minimal intersection area restricted for a valid co-location. If it is a number, so it is expressed in
         square kilometers. If it is a string, so the unit can be expressed as follows: `1600km2` or `1600000000m2`.
     listing: bool
         True if a listing of the co-located_files must be created. Default value is False
@@ -127,16 +149,38 @@ class GenerateColoc:
         self.delta_time = delta_time
         self._minimal_area = minimal_area
         self.resampling_method = kwargs.get("resampling_method", None)
-        self.delta_time_np = np.timedelta64(delta_time, "m")
+        self.delta_time_np = _td_minutes(delta_time)
         self.destination_folder = destination_folder
         self._listing_filename = kwargs.get("listing_filename", None)
         self._colocation_filename = kwargs.get("colocation_filename", None)
         # define other attributes
-        self.comparison_files = self.get_comparison_files
+        self.comparison_files = self.get_comparison_files()
         self.intersections = None
         self.colocated_files = None
         self.fill_intersections()
-        self.fill_colocated_files()
+
+    @classmethod
+    def with_shared(cls, config=None, **shared_kwargs):
+        """
+        Get a factory of `GenerateColoc` bound to arguments shared by many co-locations (ex: `delta_time`,
+        `minimal_area`, `resampling_method`...), so that only product-specific arguments are given for each
+        co-location. The configuration file, if given, is set once here instead of for each instance.
+
+        Parameters
+        ----------
+        config: str | None
+            Path to configuration file to use.
+        shared_kwargs: dict
+            Arguments of `GenerateColoc` common to all the co-locations.
+
+        Returns
+        -------
+        functools.partial
+            Callable creating a `GenerateColoc` from the remaining (keyword) arguments.
+        """
+        if config is not None:
+            set_config(config)
+        return functools.partial(cls, **shared_kwargs)
 
     @property
     def minimal_area(self):
@@ -145,23 +189,23 @@ class GenerateColoc:
 
         Returns
         -------
-        int
+        int | float
             Minimal area intersection in square kilometers
         """
-        if isinstance(self._minimal_area, int):
+        if isinstance(self._minimal_area, (int, float)):
             return self._minimal_area
         elif isinstance(self._minimal_area, str):
             if self._minimal_area.endswith("km2"):
                 return int(self._minimal_area.replace("km2", ""))
             elif self._minimal_area.endswith("m2"):
-                return int(self._minimal_area.replace("m2", "")) * 1e6
+                return int(self._minimal_area.replace("m2", "")) / 1e6
             else:
                 raise ValueError(
                     "minimal_area expressed as a string in argument must end by km2 or m2"
                 )
         else:
             raise TypeError(
-                "minimal_area expressed as an argument must be a string or an integer. Please refer to "
+                "minimal_area expressed as an argument must be a string or a number. Please refer to "
                 + "the documentation"
             )
 
@@ -266,7 +310,7 @@ class GenerateColoc:
             name2 = intersection.meta2.product_name.split(".")[0]
             return f"sat_coloc_{name1}__{name2}.nc"
 
-    @property
+    @functools.cached_property
     def product1_start_date(self):
         """
         Get start date of the product1 considering the delta time
@@ -278,7 +322,7 @@ class GenerateColoc:
         """
         return self.product1.start_date - self.delta_time_np
 
-    @property
+    @functools.cached_property
     def product1_stop_date(self):
         """
         Get stop date of the product1 considering the delta time
@@ -290,7 +334,6 @@ class GenerateColoc:
         """
         return self.product1.stop_date + self.delta_time_np
 
-    @property
     def get_comparison_files(self):
         """
         Get all the files from the specified database that match with the start and stop dates
@@ -310,27 +353,64 @@ class GenerateColoc:
                 input_ds=self.input_ds,
                 level=self.level,
             )
-            if self.product1_id in all_comparison_files:
-                all_comparison_files.remove(self.product1_id)
-            return all_comparison_files
+            # single pass that keeps the order of the files
+            return [
+                file for file in all_comparison_files if file != self.product1_id
+            ]
 
     def fill_intersections(self):
         """
         Fill a dictionary as `self.intersections` with intersections (`sar_coloc.ProductIntersection`) between
-        `self.product1_id` and products that are in `self.comparison_files`. If no products are in
-        `self.comparison_files`, so `self.intersections` remains with None value.
+        `self.product1_id` and products that are in `self.comparison_files`, and a list as `self.colocated_files` with
+        the file paths of the products that can be colocated with `self.product1_id` (both in a single pass). Products
+        that don't match `self.product1_id` in time are found first: they keep an intersection in `self.intersections`,
+        but it is not computed. If no products are in `self.comparison_files`, so `self.intersections` and
+        `self.colocated_files` remain with None value.
         """
         _intersections = {}
+        _colocated_files = []
         if len(self.footprints_other) != len(self.comparison_files):
             fp = [None for _ in self.comparison_files]
         else:
             fp = self.footprints_other
-        for i in range(len(self.comparison_files)):
+
+        def _open_one(i):
+            file = self.comparison_files[i]
+            try:
+                if (self.product2 is not None) and (file == self.product2_id):
+                    # product 2 has already been opened in `__init__`
+                    opened_file = self.product2
+                else:
+                    opened_file = call_meta_class(
+                        file,
+                        product_generation=self._product_generation,
+                        footprint=fp[i],
+                    )
+                return file, opened_file, opened_file.start_date, opened_file.stop_date
+            except FileNotFoundError:
+                return None
+
+        # Opening each comparison product is independent and mostly I/O, so a thread pool is used. `map` keeps the
+        # order of `self.comparison_files` in the results.
+        n_files = len(self.comparison_files)
+        with ThreadPoolExecutor(max_workers=_max_workers(n_files)) as ex:
+            opened = [res for res in ex.map(_open_one, range(n_files)) if res is not None]
+        if len(opened) > 0:
+            # Cheap prefilter: products that can't match in time (same test as
+            # `ProductIntersection.has_intersection`) are found at once, before computing any intersection.
+            starts = np.array([res[2] for res in opened], dtype="datetime64[ns]")
+            stops = np.array([res[3] for res in opened], dtype="datetime64[ns]")
+            time_match = (starts - self.delta_time_np <= self.product1_stop_date) & (
+                stops + self.delta_time_np >= self.product1_start_date
+            )
+            # unknown dates are left to the intersection
+            time_match |= np.isnat(starts) | np.isnat(stops)
+        else:
+            time_match = []
+        # The intersections are built sequentially: `ProductIntersection` reformats `self.product1` in place, which
+        # is shared by all of them. Each opened product keeps an intersection, even without time match.
+        for (file, opened_file, _, _), match in zip(opened, time_match):
             try:
-                file = self.comparison_files[i]
-                opened_file = call_meta_class(
-                    file, product_generation=self._product_generation, footprint=fp[i]
-                )
                 intersecter = ProductIntersection(
                     self.product1,
                     opened_file,
@@ -339,25 +419,16 @@ class GenerateColoc:
                     resampling_method=self.resampling_method,
                     product_generation=self._product_generation,
                 )
-                _intersections[file] = intersecter
+                has_intersection = match and intersecter.has_intersection
             except FileNotFoundError:
-                pass
-        if len(list(_intersections.keys())) > 0:
+                continue
+            _intersections[file] = intersecter
+            if has_intersection:
+                _colocated_files.append(file)
+        if len(_intersections) > 0:
             self.intersections = _intersections
-
-    def fill_colocated_files(self):
-        """
-        Fill a dictionary as `self.colocated_files` with file paths of products from `self.comparison_files` that can be
-        colocated with `self.product1_id`. If no products are in `self.comparison_files`, so `self.colocated_files`
-        remains with None value.
-        """
-        if self.intersections is not None:
-            _colocated_files = []
-            for filename, intersection in self.intersections.items():
-                if intersection.has_intersection:
-                    _colocated_files.append(filename)
-            if len(_colocated_files) > 0:
-                self.colocated_files = _colocated_files
+        if len(_colocated_files) > 0:
+            self.colocated_files = _colocated_files
 
     @property
     def has_coloc(self):
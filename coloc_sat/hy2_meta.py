@@ -4,6 +4,7 @@ logger = logging.getLogger(__name__)
 
 from .tools import correct_dataset
 import os
+import functools
 import numpy as np
 import xarray as xr
 
@@ -50,6 +51,20 @@ class GetHy2Meta:
                 f"No footprint for GetHY2Meta (product {self.product_path})"
             )
 
+    @functools.cached_property
+    def _time_bounds(self):
+        """
+        Minimum and maximum valid times of the dataset, computed once (cache is reset when the dataset is set).
+
+        Returns
+        -------
+        (numpy.datetime64, numpy.datetime64)
+            Minimum and maximum times
+        """
+        # single reduction on the raw times (no sort), NaT are skipped
+        times = self.dataset[self.time_name].values
+        return np.nanmin(times), np.nanmax(times)
+
     @property
     def start_date(self):
         """
@@ -60,7 +75,7 @@ class GetHy2Meta:
         numpy.datetime64
             Start time
         """
-        return min(np.unique(self.dataset[self.time_name]))
+        return self._time_bounds[0]
 
     @property
     def stop_date(self):
@@ -72,7 +87,7 @@ class GetHy2Meta:
         numpy.datetime64
             Stop time
         """
-        return max(np.unique(self.dataset[self.time_name]))
+        return self._time_bounds[1]
 
     @property
     def longitude_name(self):
@@ -158,6 +173,7 @@ class GetHy2Meta:
             new Dataset
         """
         self._dataset = value
+        self.__dict__.pop("_time_bounds", None)
 
     @property
     def orbit_segment_name(self):
@@ -182,10 +198,7 @@ class GetHy2Meta:
         bool
             Presence or not of an orbit segmentation
         """
-        if self.orbit_segment_name is not None:
-            return True
-        else:
-            return False
+        return self.orbit_segment_name is not None
 
     @longitude_name.setter
     def longitude_name(self, value):
@@ -235,7 +248,7 @@ class GetHy2Meta:
         """
         # no attributes to rename
         mapper = {}
-        if attr in mapper.keys():
+        if attr in mapper:
             return mapper[attr]
         else:
             return attr
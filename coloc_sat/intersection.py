@@ -10,14 +10,16 @@ import shapely
 import rasterio
 import rasterio.enums
 from .intersection_tools import (
-    extract_times_dataset,
     are_dimensions_empty,
+    bbox_overlap,
     get_footprint_from_ll_ds,
     get_polygon_area_in_km_squared,
+    prepared_intersects,
     get_transform,
     get_common_points,
     get_nearest_time_datasets,
     remove_nat,
+    where_drop,
 )
 from .tools import (
     mean_time_diff,
@@ -25,10 +27,10 @@ from .tools import (
     convert_str_to_polygon,
     filter_data_polygon,
     compute_colocated_data,
+    geometry_edges,
+    regular_grid_polygon_mask,
 )
 from .version import __version__
-from numba.typed import Dict
-from numba.core import types
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +67,8 @@ class ProductIntersection:
         self.resampled_datasets = None
         self.common_zone_datasets = None
         self.colocation_product = None
+        # footprints of meta1 / meta2, read once from the meta objects (see `self.footprint_of`)
+        self._footprints = {}
 
     @property
     def has_intersection(self):
@@ -91,10 +95,10 @@ class ProductIntersection:
             self.stop_date = min(times1[1], times2[1])
 
         if hasattr(self.meta1, "footprint") and hasattr(self.meta2, "footprint"):
-            if self.meta1.footprint and self.meta2.footprint:
-                fp1 = self.meta1.footprint
-                fp2 = self.meta2.footprint
-                is_intersected = fp1.intersects(fp2)
+            fp1 = self.footprint_of(self.meta1)
+            fp2 = self.footprint_of(self.meta2)
+            if fp1 and fp2:
+                is_intersected = prepared_intersects(fp1, fp2)
                 if is_intersected:
                     self.fill_common_footprint(fp1.intersection(fp2))
                 return self._is_considered_as_intersected
@@ -102,9 +106,9 @@ class ProductIntersection:
         if (self.meta1.acquisition_type == "truncated_grid") and (
             self.meta2.acquisition_type == "truncated_grid"
         ):
-            fp1 = self.meta1.footprint
-            fp2 = self.meta2.footprint
-            is_intersected = fp1.intersects(fp2)
+            fp1 = self.footprint_of(self.meta1)
+            fp2 = self.footprint_of(self.meta2)
+            is_intersected = prepared_intersects(fp1, fp2)
             if is_intersected:
                 self.fill_common_footprint(fp1.intersection(fp2))
             return self._is_considered_as_intersected
@@ -153,6 +157,32 @@ class ProductIntersection:
         ):
             return self.intersection_truncated_swath_swath()
 
+    def footprint_of(self, meta):
+        """
+        Get the footprint of `self.meta1` or `self.meta2`. The footprint property of a meta object can be costly (ex:
+        union of the sub-datasets footprints for a SAR product), so it is read only once by intersection.
+
+        Parameters
+        ----------
+        meta: coloc_sat.GetSarMeta | coloc_sat.GetSmosMeta | coloc_sat.GetEra5Meta | coloc_sat.GetHy2Meta |
+        coloc_sat.GetSmapMeta | coloc_sat.GetWindsatMeta
+            `self.meta1` or `self.meta2`
+
+        Returns
+        -------
+        shapely.geometry.base.BaseGeometry | None
+            Footprint of the meta object
+        """
+        if meta is self.meta1:
+            key = 1
+        elif meta is self.meta2:
+            key = 2
+        else:
+            return meta.footprint
+        if key not in self._footprints:
+            self._footprints[key] = meta.footprint
+        return self._footprints[key]
+
     def fill_common_footprint(self, footprint):
         if self.common_footprint is None:
             self.common_footprint = footprint
@@ -256,7 +286,7 @@ class ProductIntersection:
             #  the co-location is with a truncated grid
             if other_meta.acquisition_type == "truncated_grid":
                 self._datasets[model.product_name] = geographic_intersection(
-                    model, polygon=other_meta.footprint
+                    model, polygon=self.footprint_of(other_meta)
                 )
             self.fill_common_footprint(fp)
         # if it is a model so there is data every day and worldwide => file can be co-located
@@ -277,30 +307,17 @@ class ProductIntersection:
 
         def rasterize_polygon(open_acquisition, polygon):
             if open_acquisition.acquisition_type == "daily_regular_grid":
-                lon_name = open_acquisition.longitude_name
-                lat_name = open_acquisition.latitude_name
-                min_bounds = (
-                    min(np.unique(open_acquisition.dataset[lon_name])),
-                    min(np.unique(open_acquisition.dataset[lat_name])),
-                )
+                lon = open_acquisition.dataset[open_acquisition.longitude_name].values
+                lat = open_acquisition.dataset[open_acquisition.latitude_name].values
                 # we can get resolutions like this because it is a regular grid
-                lon_res = abs(
-                    open_acquisition.dataset[lon_name][1]
-                    - open_acquisition.dataset[lon_name][0]
-                )
-                lat_res = abs(
-                    open_acquisition.dataset[lat_name][1]
-                    - open_acquisition.dataset[lat_name][0]
-                )
-                out_shape = [
-                    len(open_acquisition.dataset[lat_name]),
-                    len(open_acquisition.dataset[lon_name]),
-                ]
-                transform = rasterio.Affine.translation(
-                    min_bounds[0], min_bounds[1]
-                ) * rasterio.Affine.scale(lon_res, lat_res)
-                return rasterio.features.rasterize(
-                    shapes=[polygon], out_shape=out_shape, transform=transform
+                return regular_grid_polygon_mask(
+                    float(lon.min()),
+                    float(abs(lon[1] - lon[0])),
+                    lon.size,
+                    float(lat.min()),
+                    float(abs(lat[1] - lat[0])),
+                    lat.size,
+                    *geometry_edges(polygon),
                 )
             else:
                 raise ValueError(
@@ -308,36 +325,49 @@ class ProductIntersection:
                 )
 
         def geographic_intersection(open_acquisition, polygon=None):
+            # bounding box of the grid cells inside the polygon, and mask of these cells (None without polygon)
             if open_acquisition.acquisition_type == "daily_regular_grid":
                 if polygon is None:
-                    return open_acquisition.dataset
+                    return open_acquisition.dataset, None
                 else:
                     lon_name = open_acquisition.longitude_name
                     lat_name = open_acquisition.latitude_name
 
-                    rasterized = rasterize_polygon(open_acquisition, polygon)
-                    dataset = open_acquisition.dataset.where(rasterized)
-
-                    dataset = dataset.dropna(lon_name, how="all")
-                    dataset = dataset.dropna(lat_name, how="all")
-                    return dataset
+                    row_lo, row_hi, col_lo, col_hi, mask = rasterize_polygon(
+                        open_acquisition, polygon
+                    )
+                    dataset = open_acquisition.dataset.isel(
+                        {
+                            lat_name: slice(row_lo, row_hi),
+                            lon_name: slice(col_lo, col_hi),
+                        }
+                    )
+                    return dataset, xr.DataArray(mask, dims=(lat_name, lon_name))
             else:
                 raise ValueError(
                     "`geographic_intersection` only can be applied on daily regular grid acquisition"
                 )
 
-        def spatial_temporal_intersection(open_acquisition, polygon=None):
+        def spatial_temporal_intersection(open_acquisition, dataset, geographic_mask):
             if open_acquisition.acquisition_type == "daily_regular_grid":
-                dataset = geographic_intersection(open_acquisition, polygon)
-                dataset = extract_times_dataset(
-                    open_acquisition,
-                    dataset=dataset,
-                    start_date=self.start_date,
-                    stop_date=self.stop_date,
-                )
-                return dataset.where(
-                    ~np.isnan(dataset[open_acquisition.wind_name]), drop=True
+                if dataset is None:
+                    return dataset
+                start_date = self.start_date
+                stop_date = self.stop_date
+                if start_date is None:
+                    start_date = open_acquisition.start_date
+                if stop_date is None:
+                    stop_date = open_acquisition.stop_date
+                # geographic, temporal and valid wind conditions are combined, so that the dataset is masked only once
+                times = dataset[open_acquisition.time_name]
+                condition = (
+                    (times >= start_date)
+                    & (times <= stop_date)
+                    & ~np.isnan(dataset[open_acquisition.wind_name])
                 )
+                if geographic_mask is not None:
+                    condition = condition & geographic_mask
+                return where_drop(dataset, condition)
             else:
                 raise ValueError(
                     "`spatial_temporal_intersection` only can be applied on daily regular grid acquisition"
@@ -346,7 +376,7 @@ class ProductIntersection:
         def verify_intersection(_ds):
             if (_ds is not None) and (not are_dimensions_empty(_ds)):
                 poly = get_footprint_from_ll_ds(daily, _ds)
-                is_intersected = poly.intersects(fp)
+                is_intersected = prepared_intersects(fp, poly)
                 if is_intersected:
                     self.fill_common_footprint(poly.intersection(fp))
                 return self._is_considered_as_intersected
@@ -368,19 +398,26 @@ class ProductIntersection:
                 "intersection_drg_truncated_grid only can be used with a daily regular grid \
                                 acquisition and a truncated one"
             )
-        fp = truncated.footprint
+        fp = self.footprint_of(truncated)
+        # cheap bounding box test before any rasterization or polygon operation
+        if hasattr(daily, "footprint_bbox") and not bbox_overlap(
+            daily.footprint_bbox, fp.bounds
+        ):
+            return False
+        # the polygon is rasterized once, the grid is the same for all the orbits
+        daily_box, geographic_mask = geographic_intersection(daily, polygon=fp)
         if daily.has_orbited_segmentation:
             li = []
             # list that store booleans to express if an orbit has an intersection
             orbit_intersections = []
-            for orbit in daily.dataset[daily.orbit_segment_name].data:
-                sub_daily = copy.copy(daily)
-                # Select orbit in the dataset of sub_daily
-                sub_daily.dataset = sub_daily.dataset.sel(
-                    **{sub_daily.orbit_segment_name: orbit}
+            for orbit in daily_box[daily.orbit_segment_name].data:
+                # Select orbit in the bounding box of the polygon
+                _ds = spatial_temporal_intersection(
+                    daily,
+                    daily_box.sel(**{daily.orbit_segment_name: orbit}),
+                    geographic_mask,
                 )
-                _ds = spatial_temporal_intersection(sub_daily, polygon=fp)
-                li.append(_ds.assign_coords(**{sub_daily.orbit_segment_name: orbit}))
+                li.append(_ds.assign_coords(**{daily.orbit_segment_name: orbit}))
                 orbit_intersections.append(verify_intersection(_ds))
 
             self._datasets[daily.product_name] = xr.concat(
@@ -390,7 +427,7 @@ class ProductIntersection:
             # if one of the orbit has an intersection, return True
             return any(orbit_intersections)
         else:
-            _ds = spatial_temporal_intersection(daily, polygon=fp)
+            _ds = spatial_temporal_intersection(daily, daily_box, geographic_mask)
             self._datasets[daily.product_name] = _ds
             return verify_intersection(_ds)
 
@@ -406,40 +443,44 @@ class ProductIntersection:
             True if there is an intersection (so if the products are co-located)
         """
 
-        def geographic_intersection(open_acquisition, polygon=None):
-            if open_acquisition.acquisition_type == "swath":
-                if polygon is None:
-                    return open_acquisition.dataset
-                else:
-                    lon_name = open_acquisition.longitude_name
-                    lat_name = open_acquisition.latitude_name
-
-                    ds_scat = open_acquisition.dataset
-                    # Find the scatterometer points that are within the sar swath bounding box
-                    min_lon, min_lat, max_lon, max_lat = polygon.bounds
-                    condition = (
-                        (ds_scat[lon_name] > min_lon)
-                        & (ds_scat[lon_name] < max_lon)
-                        & (ds_scat[lat_name] > min_lat)
-                        & (ds_scat[lat_name] < max_lat)
-                    )
-                    ds_scat_intersected = ds_scat.where(condition, drop=True)
-                    return ds_scat_intersected
-            else:
-                raise ValueError(
-                    "`geographic_intersection` only can be applied on daily regular grid acquisition"
-                )
+        def geographic_condition(open_acquisition, polygon):
+            lon_name = open_acquisition.longitude_name
+            lat_name = open_acquisition.latitude_name
+
+            ds_scat = open_acquisition.dataset
+            # Find the scatterometer points that are within the sar swath bounding box
+            min_lon, min_lat, max_lon, max_lat = polygon.bounds
+            lon, lat = xr.broadcast(ds_scat[lon_name], ds_scat[lat_name])
+            lon_values = lon.values
+            lat_values = lat.values
+            condition = (
+                (lon_values > min_lon)
+                & (lon_values < max_lon)
+                & (lat_values > min_lat)
+                & (lat_values < max_lat)
+            )
+            return xr.DataArray(condition, dims=lon.dims)
 
         def spatial_temporal_intersection(open_acquisition, polygon=None):
             if open_acquisition.acquisition_type == "swath":
-                dataset = geographic_intersection(open_acquisition, polygon)
-                dataset = extract_times_dataset(
-                    open_acquisition,
-                    dataset=dataset,
-                    start_date=self.start_date,
-                    stop_date=self.stop_date,
-                )
-                return dataset
+                dataset = open_acquisition.dataset
+                if dataset is None:
+                    return dataset
+                start_date = self.start_date
+                stop_date = self.stop_date
+                if start_date is None:
+                    start_date = open_acquisition.start_date
+                if stop_date is None:
+                    stop_date = open_acquisition.stop_date
+                # time criteria and bounding box are fused in a single mask, applied in a single selection (same
+                # result as the geographic then the temporal `where(..., drop=True)`)
+                times = dataset[open_acquisition.time_name]
+                condition = (times >= start_date) & (times <= stop_date)
+                if polygon is not None:
+                    condition = condition & geographic_condition(
+                        open_acquisition, polygon
+                    )
+                return where_drop(dataset, condition)
             else:
                 raise ValueError(
                     "`spatial_temporal_intersection` only can be applied on daily regular grid acquisition"
@@ -458,7 +499,7 @@ class ProductIntersection:
                 # Verify if a part of this multipoint can be intersected with the truncated swath footprint
                 return mpt.intersects(footprint)"""
                 poly = get_footprint_from_ll_ds(swath_acquisition, _ds)
-                is_intersected = poly.intersects(footprint)
+                is_intersected = prepared_intersects(footprint, poly)
                 if is_intersected:
                     self.fill_common_footprint(poly.intersection(footprint))
                 return self._is_considered_as_intersected
@@ -482,7 +523,7 @@ class ProductIntersection:
             )
 
         # footprint of the truncated swath
-        fp = truncated.footprint
+        fp = self.footprint_of(truncated)
 
         if swath.has_orbited_segmentation:
             # list that store booleans to express if an orbit has an intersection
@@ -718,36 +759,34 @@ class ProductIntersection:
         lon_name_2 = meta2.longitude_name
         lat_name_2 = meta2.latitude_name
 
-        lon_1 = ds1[lon_name_1].values
-        lat_1 = ds1[lat_name_1].values
-        lon_2 = ds2[lon_name_2].values
-        lat_2 = ds2[lat_name_2].values
+        # the numba kernels are compiled for float64 coordinates
+        lon_1 = np.ascontiguousarray(ds1[lon_name_1].values, dtype=np.float64)
+        lat_1 = np.ascontiguousarray(ds1[lat_name_1].values, dtype=np.float64)
+        lon_2 = np.ascontiguousarray(ds2[lon_name_2].values, dtype=np.float64)
+        lat_2 = np.ascontiguousarray(ds2[lat_name_2].values, dtype=np.float64)
 
         lon_1_delta = np.mean(np.abs(np.diff(lon_1[~np.isnan(lon_1)])))
         lon_2_delta = np.mean(np.abs(np.diff(lon_2[~np.isnan(lon_2)])))
         if np.isnan(lon_1_delta) or np.isnan(lon_2_delta):
             raise ValueError("lon_1_delta or lon_2_delta should not be NaN")
 
-        data_vars_1 = Dict.empty(
-            key_type=types.unicode_type, value_type=types.float64[:, :]
-        )
-
+        # the kernels read all the variables of a pixel at once: they are stacked along the last axis
         # FIXME astype unknown effect on bool or else
-        for n in ds1.data_vars:
-            data_vars_1[n] = ds1[n].astype("float64").values
-
-        data_vars_2 = Dict.empty(
-            key_type=types.unicode_type, value_type=types.float64[:, :]
+        names_1 = list(ds1.data_vars)
+        names_2 = list(ds2.data_vars)
+        data_1 = np.stack(
+            [ds1[n].values.astype(np.float64, copy=False) for n in names_1], axis=-1
+        )
+        data_2 = np.stack(
+            [ds2[n].values.astype(np.float64, copy=False) for n in names_2], axis=-1
         )
-        for n in ds2.data_vars:
-            data_vars_2[n] = ds2[n].astype("float64").values
 
         polyg_coords = np.array(self.common_footprint.exterior.coords)
         data_1_reduced, lon_1_reduced, lat_1_reduced = filter_data_polygon(
-            lon_1, lat_1, data_vars_1, polyg_coords
+            lon_1, lat_1, data_1, polyg_coords
         )
         data_2_reduced, lon_2_reduced, lat_2_reduced = filter_data_polygon(
-            lon_2, lat_2, data_vars_2, polyg_coords
+            lon_2, lat_2, data_2, polyg_coords
         )
 
         if lon_1_reduced is None or lon_2_reduced is None:
@@ -766,49 +805,38 @@ class ProductIntersection:
             lon_reduced = lon_2_reduced
             lat_reduced = lat_2_reduced
 
-        colocated_data_2 = Dict.empty(
-            key_type=types.unicode_type, value_type=types.float64[:, :]
-        )
-        for n in data_vars_2:
-            colocated_data_2[n] = np.full(lon_reduced.shape, np.nan)
-
-        colocated_data_1 = Dict.empty(
-            key_type=types.unicode_type, value_type=types.float64[:, :]
-        )
-        for n in data_vars_1:
-            colocated_data_1[n] = np.full(lon_reduced.shape, np.nan)
+        def main_var_index(names):
+            return names.index("wind_speed") if "wind_speed" in names else -1
 
         logger.info("Start pixel association...")
         if lon_1_delta > lon_2_delta:
             reprojected_dataset = "dataset2"
-            colocated_data_1, colocated_data_2 = compute_colocated_data(
+            colocated_stack_1, colocated_stack_2 = compute_colocated_data(
                 lon_1_reduced,
                 lat_1_reduced,
-                lon_2,
-                lat_2,
+                lon_2_reduced,
+                lat_2_reduced,
                 data_1_reduced,
                 data_2_reduced,
                 1,
-                colocated_data_1,
-                colocated_data_2,
-                "wind_speed",
+                main_var_index(names_1),
                 radius_km,
             )
         else:
             reprojected_dataset = "dataset1"
-            colocated_data_2, colocated_data_1 = compute_colocated_data(
+            colocated_stack_2, colocated_stack_1 = compute_colocated_data(
                 lon_2_reduced,
                 lat_2_reduced,
-                lon_1,
-                lat_1,
+                lon_1_reduced,
+                lat_1_reduced,
                 data_2_reduced,
                 data_1_reduced,
                 1,
-                colocated_data_2,
-                colocated_data_1,
-                "wind_speed",
+                main_var_index(names_2),
                 radius_km,
             )
+        colocated_data_1 = {n: colocated_stack_1[..., k] for k, n in enumerate(names_1)}
+        colocated_data_2 = {n: colocated_stack_2[..., k] for k, n in enumerate(names_2)}
 
         colocated_ds_1 = xr.Dataset(
             {var: (("y", "x"), colocated_data_1[var]) for var in colocated_data_1},
@@ -1052,10 +1080,10 @@ class ProductIntersection:
                 or meta.acquisition_type == "truncated_swath"
             ):
                 # if the acquisition is a truncated swath, the dataset (so the footprint) is already time selective
-                footprint = meta.footprint
+                footprint = self.footprint_of(meta)
             else:
-                if hasattr(meta, "footprint") and meta.footprint:
-                    footprint = meta.footprint
+                if hasattr(meta, "footprint") and self.footprint_of(meta):
+                    footprint = self.footprint_of(meta)
                 else:
                     footprint = get_footprint_from_ll_ds(
                         meta, ds, self.start_date, self.stop_date
@@ -1248,6 +1276,7 @@ class ProductIntersection:
         Setter of the first metaobject.
         """
         self._meta1 = value
+        self._footprints.pop(1, None)
 
     @meta2.setter
     def meta2(self, value):
@@ -1255,3 +1284,4 @@ class ProductIntersection:
         Getter of the second metaobject.
         """
         self._meta2 = value
+        self._footprints.pop(2, None)
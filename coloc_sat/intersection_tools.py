@@ -1,9 +1,11 @@
+import threading
 import numpy as np
+import xarray as xr
 import pyproj
+import shapely
 from shapely import MultiPolygon
 from shapely.geometry import Polygon, MultiPoint, LineString, Point
 from itertools import product
-import math
 from affine import Affine
 from .tools import extract_name_from_meta_class, convert_str_to_polygon
 
@@ -43,6 +45,33 @@ def extract_times_dataset(acquisition, dataset=None, start_date=None, stop_date=
                          (dataset[time_name] <= stop_date), drop=True)
 
 
+def where_drop(dataset, condition):
+    """
+    Same result as `dataset.where(condition, drop=True)`, but the indexes where `condition` has True values are
+    selected first, so that only this reduced dataset is masked (instead of masking the whole dataset and dropping
+    after).
+
+    Parameters
+    ----------
+    dataset: xarray.Dataset
+        Dataset to mask
+    condition: xarray.DataArray
+        Boolean mask, whose dimensions are dimensions of `dataset`
+
+    Returns
+    -------
+    xarray.Dataset
+        Masked dataset, without the indexes where `condition` is always False
+    """
+    values = condition.values
+    indexers = {}
+    for axis, dim in enumerate(condition.dims):
+        other_axes = tuple(a for a in range(values.ndim) if a != axis)
+        indexers[dim] = np.flatnonzero(values.any(axis=other_axes))
+    values_box = values[np.ix_(*indexers.values())]
+    return dataset.isel(indexers).where(xr.DataArray(values_box, dims=condition.dims))
+
+
 def are_dimensions_empty(dataset):
     """
     Verify if a dataset has all its dimensions empty
@@ -57,10 +86,57 @@ def are_dimensions_empty(dataset):
     bool
         True if dataset has all its dimensions empty
     """
-    for dimension in dataset.dims:
-        if len(dataset[dimension]) != 0:
-            return False  # One dimension isn't empty => there are values
-    return True
+    # sizes are read from the dataset mapping of dimension sizes, without building a DataArray per dimension. Stops at
+    # the first dimension that isn't empty (=> there are values)
+    return all(size == 0 for size in dataset.sizes.values())
+
+
+def bbox_overlap(bbox1, bbox2):
+    """
+    Verify if 2 bounding boxes overlap
+
+    Parameters
+    ----------
+    bbox1: (float, float, float, float)
+        First bounding box as (min_lon, min_lat, max_lon, max_lat)
+    bbox2: (float, float, float, float)
+        Second bounding box as (min_lon, min_lat, max_lon, max_lat)
+
+    Returns
+    -------
+    bool
+        True if the bounding boxes overlap
+    """
+    return not (bbox1[2] < bbox2[0] or bbox2[2] < bbox1[0] or
+                bbox1[3] < bbox2[1] or bbox2[3] < bbox1[1])
+
+
+# GEOS prepared geometries build their indexes lazily, on first use: a footprint shared between threads (ex: the
+# footprint of product 1 in `GenerateColoc`) is only prepared and queried under this lock
+_prepared_lock = threading.Lock()
+
+
+def prepared_intersects(geometry, other):
+    """
+    Verify if 2 geometries intersect, `geometry` being prepared (in place, so only once) to speed up the repeated tests
+    against the same footprint.
+
+    Parameters
+    ----------
+    geometry: shapely.geometry.base.BaseGeometry
+        Geometry tested many times (ex: a footprint)
+    other: shapely.geometry.base.BaseGeometry
+        Other geometry
+
+    Returns
+    -------
+    bool
+        True if the geometries intersect
+    """
+    with _prepared_lock:
+        if not shapely.is_prepared(geometry):
+            shapely.prepare(geometry)
+        return bool(geometry.intersects(other))
 
 
 def get_polygon_area_in_km_squared(polygon):
@@ -127,11 +203,18 @@ def get_footprint_from_ll_ds(acquisition, ds=None, start_date=None, stop_date=No
         ds = acquisition.dataset
     if (start_date is not None) or (stop_date is not None):
         ds = extract_times_dataset(acquisition, dataset=ds, start_date=start_date, stop_date=stop_date)
-    flatten_lon = ds[acquisition.longitude_name].data.flatten()
-    flatten_lat = ds[acquisition.latitude_name].data.flatten()
-    mpt_coords = [(lon, lat) for lon, lat in product(flatten_lon, flatten_lat) if not (math.isnan(lon) or
-                                                                                       math.isnan(lat))]
-    return MultiPoint(mpt_coords).convex_hull
+    flatten_lon = ds[acquisition.longitude_name].values.ravel()
+    flatten_lat = ds[acquisition.latitude_name].values.ravel()
+    flatten_lon = flatten_lon[~np.isnan(flatten_lon)]
+    flatten_lat = flatten_lat[~np.isnan(flatten_lat)]
+    # The footprint is the convex hull of all the (lon, lat) pairs of the valid longitudes and latitudes. This hull only
+    # depends on the extreme values, so it is built from the 4 corners instead of the len(lon) * len(lat) points.
+    if flatten_lon.size == 0 or flatten_lat.size == 0:
+        return MultiPoint().convex_hull
+    lon_bounds = [flatten_lon.min(), flatten_lon.max()]
+    lat_bounds = [flatten_lat.min(), flatten_lat.max()]
+    corners = shapely.points(list(product(lon_bounds, lat_bounds)))
+    return shapely.multipoints(corners).convex_hull
 
 
 def get_transform(ds, lon_name, lat_name):
@@ -1,6 +1,9 @@
+import json
 import logging
 
 import geopandas as gpd
+import pyarrow.parquet as pq
+import shapely
 from coloc_sat.generate_coloc import GenerateColoc
 from coloc_sat.tools import (
     get_all_comparison_files,
@@ -9,7 +12,7 @@ from coloc_sat.tools import (
     check_file_match_pattern_date,
 )
 from coloc_sat import init_cluster
-from typing import Optional
+from typing import Optional, Union
 import numpy as np
 import os
 from dask.distributed import Client
@@ -55,6 +58,143 @@ def teardown_logger(logger, fh, ch):
     ch.close()
 
 
+def get_data_base(paths, ds_name):
+    """
+    Get the basename pattern of the first level 2 root path configured for a dataset.
+
+    Parameters
+    ----------
+    paths: dict
+        `paths` section of the configuration
+    ds_name: str
+        Dataset name (ex: S1, RS2, RCM, HY2, ...)
+
+    Returns
+    -------
+    str
+        Basename pattern of the dataset files
+    """
+    ds_paths = paths[ds_name]
+    if ds_name in ("S1", "RS2", "RCM"):
+        ds_paths = ds_paths["L2"]
+    return os.path.basename(ds_paths[0])
+
+
+# Columns of the .parquet file used for the co-location; the others are never read
+PARQUET_COLUMNS = [
+    "ref_geometry",
+    "ref_start",
+    "ref_end",
+    "ref_granule",
+    "match_geometry",
+    "match_start",
+    "match_end",
+    "match_granule",
+    "destination_folder",
+]
+
+
+def iter_parquet_batches(parquet, batch_size=8192):
+    """
+    Read a .parquet file registering colocations by batches of rows, so that only one batch is in memory at a time.
+    Only columns from `PARQUET_COLUMNS` are read.
+
+    Parameters
+    ----------
+    parquet: str
+        Path to parquet file
+    batch_size: int
+        Maximum number of rows in a batch
+
+    Yields
+    ------
+    pandas.DataFrame
+        Batch of rows, geometry columns are decoded as `geopandas.GeoSeries` with the crs of the GeoParquet metadata
+    """
+    pf = pq.ParquetFile(parquet)
+    schema = pf.schema_arrow
+    geo_metadata = json.loads((schema.metadata or {}).get(b"geo", b"{}"))
+    geo_columns = geo_metadata.get("columns", {})
+    columns = [col for col in PARQUET_COLUMNS if col in schema.names]
+    for batch in pf.iter_batches(batch_size=batch_size, columns=columns):
+        df = batch.to_pandas()
+        for col, col_metadata in geo_columns.items():
+            if col in df.columns:
+                # as in `geopandas.read_parquet`, a missing crs is OGC:CRS84 and a null one is undefined
+                df[col] = gpd.GeoSeries.from_wkb(
+                    df[col], crs=col_metadata.get("crs", "OGC:CRS84")
+                )
+        yield df
+
+
+def iter_parquet_rows(
+    parquet, destination_folder=None, filter_dataset_unique=None, batch_size=8192
+):
+    """
+    Stream the rows of a .parquet file registering colocations. Rows for which reference and match geometries
+    are disjoint are ignored.
+
+    Parameters
+    ----------
+    parquet: str
+        Path to parquet file
+    destination_folder: str | None
+        Output folder for coloc files, used when the parquet doesn't have a 'destination_folder' column
+    filter_dataset_unique: str | None
+        Can be "ref" or "match", specifies which dataset will be filtered to keep unique values (filtered on
+        granule name). For a granule, the row with the smallest start time difference is kept.
+    batch_size: int
+        Number of rows read at once from the parquet
+
+    Yields
+    ------
+    pandas.Series
+        Row of the parquet
+    """
+    if filter_dataset_unique and filter_dataset_unique not in ("ref", "match"):
+        raise ValueError(
+            f"Unsupported value {filter_dataset_unique} for filter_dataset_unique. Must be 'ref' or 'match'."
+        )
+
+    # For each granule, smallest time difference, position in the parquet and row (when filter_dataset_unique is
+    # used). Rows are yielded by time difference then position, as a stable sort of the whole parquet would.
+    best_rows = {}
+    position = 0
+    for batch in iter_parquet_batches(parquet, batch_size=batch_size):
+        if "destination_folder" not in batch.columns:
+            if destination_folder is None:
+                raise ValueError(
+                    "destination_folder is neither given in parquet or parameters."
+                )
+            batch["destination_folder"] = destination_folder
+
+        # Drop pairs whose footprints are disjoint (stale parquet) with a single vectorized GEOS call,
+        # before any file is searched or opened for them
+        intersects = shapely.intersects(
+            np.asarray(batch["ref_geometry"]), np.asarray(batch["match_geometry"])
+        )
+        if not intersects.all():
+            logger.warning(
+                f"{np.count_nonzero(~intersects)} rows with disjoint ref/match geometries are ignored."
+            )
+            batch = batch[intersects]
+
+        if filter_dataset_unique:
+            granule_col = f"{filter_dataset_unique}_granule"
+            time_diffs = (batch["ref_start"] - batch["match_start"]).abs()
+            for (_, row), time_diff in zip(batch.iterrows(), time_diffs):
+                granule = row[granule_col]
+                if granule not in best_rows or time_diff < best_rows[granule][0]:
+                    best_rows[granule] = (time_diff, position, row)
+                position += 1
+        else:
+            for _, row in batch.iterrows():
+                yield row
+
+    for _, _, row in sorted(best_rows.values(), key=lambda item: item[:2]):
+        yield row
+
+
 def process_parquet_coloc(
     row,
     ds1,
@@ -76,7 +216,12 @@ def process_parquet_coloc(
     exception_to_log=True,
     log_name="coloc_hy2.log",
     status_name="coloc_hy2.status",
+    coloc_factory=None,
 ):
+    """
+    Generate the colocation of a .parquet row. `coloc_factory` can be given (see `GenerateColoc.with_shared`) to
+    reuse settings shared by all rows; config is then expected to be already set.
+    """
     if exception_to_log:
         log_path = os.path.join(destination_folder, log_name)
         status_path = os.path.join(destination_folder, status_name)
@@ -88,8 +233,14 @@ def process_parquet_coloc(
         logger.setLevel(logging.INFO)
 
     try:
-        if config is not None:
-            set_config(config)
+        if coloc_factory is None:
+            coloc_factory = GenerateColoc.with_shared(
+                product_generation=product_generation,
+                delta_time=delta_time,
+                minimal_area=minimal_area,
+                resampling_method=resampling_method,
+                config=config,
+            )
 
         footprint1 = row["ref_geometry"]
         footprint2 = row["match_geometry"]
@@ -154,17 +305,12 @@ def process_parquet_coloc(
 
         logger.info(f"Process {row['ref_granule']} and {row['match_granule']}")
 
-        generator = GenerateColoc(
+        generator = coloc_factory(
             product1_id=o_file,
             product2_id=r_file,
             footprint1=footprint2,
             footprint2=footprint1,
             destination_folder=destination_folder,
-            product_generation=product_generation,
-            delta_time=delta_time,
-            minimal_area=minimal_area,
-            resampling_method=resampling_method,
-            config=config,
         )
         status = generator.save_results()
 
@@ -186,7 +332,7 @@ def coloc_from_parquet(
     destination_folder: Optional[str],
     product_generation: bool,
     delta_time: int,
-    minimal_area: str,
+    minimal_area: Union[float, str],
     resampling_method: str,
     filter_dataset_unique: Optional[str] = None,
     config: Optional[str] = None,
@@ -214,7 +360,7 @@ def coloc_from_parquet(
     destination folder: str Output folder for coloc files. Optional
     production_generation: bool Indicates if files must be created
     delta_time: int Time in minutes. Maximum time difference between the two acquisition for the coloc to be valid.
-    minimal_area: str Minimal area for the coloc to be valid. Examples: 300km2, 10m2...
+    minimal_area: float | str Minimal area for the coloc to be valid, in km2 if it is a number. Examples: 300km2, 10m2...
     resampling_method: str Value from rasterio.enums.Resampling. Only used when colocating gridded data.
     filter_dataset_unique: str Can be "ref" or "match", specifies which dataset will be filtered to keep unique values (filtered on granule name)
     """
@@ -227,12 +373,6 @@ def coloc_from_parquet(
 
     if parallel_datarmor:
         init_cluster(n_workers=n_workers, memory=memory)
-    elif parallel:
-        from dask.distributed import Client
-
-        # Initiate Dask Client
-        client = Client(processes=True, n_workers=n_workers)
-        logger.info(f"Dashboard link: {client.dashboard_link}")
 
     ds1 = conf_data["dataset_name_1"]
     ds2 = conf_data["dataset_name_2"]
@@ -243,38 +383,14 @@ def coloc_from_parquet(
     match_time_delta_sec_1 = timedelta(seconds=conf_data["match_time_delta_seconds_1"])
     match_time_delta_sec_2 = timedelta(seconds=conf_data["match_time_delta_seconds_2"])
 
-    sar_ds = ["S1", "RS2", "RCM"]
-    if ds1 in sar_ds:
-        data_base_1 = os.path.basename(conf_data["paths"][ds1]["L2"][0])
-    else:
-        data_base_1 = os.path.basename(conf_data["paths"][ds1][0])
-
-    if ds2 in sar_ds:
-        data_base_2 = os.path.basename(conf_data["paths"][ds2]["L2"][0])
-    else:
-        data_base_2 = os.path.basename(conf_data["paths"][ds2][0])
-
-    prq = gpd.read_parquet(parquet)
+    data_base_1 = get_data_base(conf_data["paths"], ds1)
+    data_base_2 = get_data_base(conf_data["paths"], ds2)
 
-    if "destination_folder" not in prq.columns and destination_folder is not None:
-        prq["destination_folder"] = destination_folder
-    elif "destination_folder" not in prq.columns and destination_folder is None:
-        raise ValueError(
-            "destination_folder is neither given in parquet or parameters."
-        )
-
-    if filter_dataset_unique:
-        prq["time_diff"] = (prq["ref_start"] - prq["match_start"]).abs()
-        prq = prq.sort_values(by=["time_diff"])
-
-        if filter_dataset_unique == "ref":
-            prq = prq.drop_duplicates(subset=["ref_granule"])
-        elif filter_dataset_unique == "match":
-            prq = prq.drop_duplicates(subset=["match_granule"])
-        else:
-            raise ValueError(
-                f"Unsupported value {filter_dataset_unique} for filter_dataset_unique. Must be 'ref' or 'match'."
-            )
+    rows = iter_parquet_rows(
+        parquet,
+        destination_folder=destination_folder,
+        filter_dataset_unique=filter_dataset_unique,
+    )
 
     if parallel or parallel_datarmor:
         tasks = [
@@ -297,11 +413,32 @@ def coloc_from_parquet(
                 resampling_method,
                 config,
             )
-            for _, row in prq.iterrows()
+            for row in rows
         ]
-        results = compute(*tasks)
+        if parallel_datarmor:
+            results = compute(*tasks)
+        else:
+            from dask.distributed import LocalCluster
+
+            # A single local cluster is started for the whole parquet and shared by all rows.
+            # No per-worker memory limit, the available memory is managed by the host/job scheduler.
+            with LocalCluster(
+                processes=True,
+                n_workers=n_workers,
+                threads_per_worker=2,
+                memory_limit=None,
+            ) as cluster, Client(cluster) as client:
+                logger.info(f"Dashboard link: {client.dashboard_link}")
+                results = compute(*tasks)
     else:
-        for _, row in prq.iterrows():
+        # Settings shared by all rows are bound once
+        coloc_factory = GenerateColoc.with_shared(
+            product_generation=product_generation,
+            delta_time=delta_time,
+            minimal_area=minimal_area,
+            resampling_method=resampling_method,
+        )
+        for row in rows:
             status = process_parquet_coloc(
                 row,
                 ds1,
@@ -320,6 +457,7 @@ def coloc_from_parquet(
                 minimal_area,
                 resampling_method,
                 config,
+                coloc_factory=coloc_factory,
             )
             # if status == 1:
             #    raise RuntimeError(f"Fail to process, status {status}")
@@ -249,7 +249,7 @@ class GetSarMeta:
         """
         # no attributes to rename
         mapper = {}
-        if attr in mapper.keys():
+        if attr in mapper:
             return mapper[attr]
         else:
             return attr
@@ -473,10 +473,7 @@ class GetSarMeta:
         bool
             Presence or not of an orbit segmentation
         """
-        if self.orbit_segment_name is not None:
-            return True
-        else:
-            return False
+        return self.orbit_segment_name is not None
 
     class WrongProductTypeError(Exception):
         """
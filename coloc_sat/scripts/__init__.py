@@ -0,0 +1,30 @@
+import argparse
+
+
+def parse_area(value):
+    """
+    `argparse` type converting an area argument into square kilometers, so that the unit is parsed once at the
+    command line parsing.
+
+    Parameters
+    ----------
+    value: str
+        Area, with `km2` or `m2` unit (ex: `1600km2`, `1600000000m2`). A number without unit is in square kilometers.
+
+    Returns
+    -------
+    float
+        Area in square kilometers
+    """
+    value = value.strip().lower()
+    try:
+        if value.endswith("km2"):
+            return float(value[:-3])
+        elif value.endswith("m2"):
+            return float(value[:-2]) / 1e6
+        else:
+            return float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"invalid area '{value}', expected a number of km2 or m2 (ex: 1600km2)"
+        )
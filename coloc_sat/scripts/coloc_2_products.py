@@ -3,6 +3,7 @@ import sys
 import rasterio.enums
 import logging
 from shapely.wkt import loads
+from coloc_sat.scripts import parse_area
 
 
 def main():
@@ -30,35 +31,23 @@ def main():
     )
     parser.add_argument(
         "--minimal-area",
-        default="1600km2",
+        default=1600.0,
         nargs="?",
-        type=str,
-        help="Minimal intersection area in square kilometers.",
+        type=parse_area,
+        help="Minimal intersection area in square kilometers. A unit can be given (ex: 1600km2, 1600000000m2).",
     )
     parser.add_argument(
         "--listing",
         default=True,
-        action="store_true",
+        action=argparse.BooleanOptionalAction,
         help="Create a listing of co-located files.",
     )
-    parser.add_argument(
-        "--no-listing",
-        dest="listing",
-        action="store_false",
-        help="Do not create a listing.",
-    )
     parser.add_argument(
         "--product-generation",
         default=True,
-        action="store_true",
+        action=argparse.BooleanOptionalAction,
         help="Generate a co-location product.",
     )
-    parser.add_argument(
-        "--no-product-generation",
-        dest="product_generation",
-        action="store_false",
-        help="Do not generate a co-location product.",
-    )
     parser.add_argument(
         "--listing-filename",
         nargs="?",
@@ -2,6 +2,7 @@ import logging
 import argparse
 import sys
 import rasterio.enums
+from coloc_sat.scripts import parse_area
 
 
 def main():
@@ -13,8 +14,9 @@ def main():
     parser.add_argument("--destination-folder", default='/tmp', nargs='?', type=str, help="Folder path for the output.")
     parser.add_argument("--delta-time", default=30, nargs='?', type=int,
                         help="Maximum time in minutes between two product acquisitions.")
-    parser.add_argument("--minimal-area", default='1600km2', nargs='?', type=str,
-                        help="Minimal intersection area in square kilometers.")
+    parser.add_argument("--minimal-area", default=1600.0, nargs='?', type=parse_area,
+                        help="Minimal intersection area in square kilometers. A unit can be given (ex: 1600km2, "
+                             "1600000000m2).")
     parser.add_argument("--mission-name", nargs='?', type=str,
                         choices=['S1', 'RS2', 'RCM', 'HY2', 'ERA5', 'WS', 'SMOS', 'SMAP'],
                         help="Name of the dataset to be compared.")
@@ -22,13 +24,10 @@ def main():
                         help="Subset of mission products to compare with. It is a txt file that contains these paths.")
     parser.add_argument("--level", nargs='?', type=int, choices=[1, 2],
                         help="Product level (SAR missions only).")
-    parser.add_argument("--listing", default=True, action="store_true",
+    parser.add_argument("--listing", default=True, action=argparse.BooleanOptionalAction,
                         help="Create a listing of co-located files.")
-    parser.add_argument("--no-listing", dest="listing", action="store_false", help="Do not create a listing.")
-    parser.add_argument("--product-generation", default=True, action="store_true",
+    parser.add_argument("--product-generation", default=True, action=argparse.BooleanOptionalAction,
                         help="Generate a co-location product.")
-    parser.add_argument("--no-product-generation", dest="product_generation", action="store_false",
-                        help="Do not generate a co-location product.")
     parser.add_argument("--listing-filename", nargs='?', type=str,
                         help="Name of the listing file to be created.")
     parser.add_argument("--colocation-filename", nargs='?', type=str,
@@ -69,6 +68,7 @@ def main():
         sys.exit(0)
     import coloc_sat
     from coloc_sat.generate_coloc import GenerateColoc
+    from coloc_sat.tools import read_paths_file
     logger.info(f"The script is executed from {__file__}")
 
     # Check for missing required arguments
@@ -79,6 +79,10 @@ def main():
     args.ds_name = args.mission_name
     del args.mission_name
 
+    # the subset txt file is parsed once here, GenerateColoc then works on the list of paths
+    if args.input_ds:
+        args.input_ds = read_paths_file(args.input_ds)
+
     # Information for the user about listing / co-location product creation
     if args.listing is True:
         logger.info("A listing of the co-located products will be created. To disable, use --no-listing.")
@@ -1,11 +1,34 @@
 import argparse
 import sys
-import rasterio.enums
 import logging
 
-def main():
-    resampling_methods = [method.name for method in rasterio.enums.Resampling]
+from coloc_sat.scripts import parse_area
+
+# Names of rasterio resampling methods, filled on first use (see `get_resampling_methods`)
+_RESAMPLING_METHODS = None
+
+
+def get_resampling_methods():
+    """
+    Get the names of the resampling methods from rasterio.enums.Resampling. rasterio is imported and the names are
+    computed only once per process.
+
+    Returns
+    -------
+    tuple[str]
+        Resampling method names
+    """
+    global _RESAMPLING_METHODS
+    if _RESAMPLING_METHODS is None:
+        import rasterio.enums
 
+        _RESAMPLING_METHODS = tuple(
+            method.name for method in rasterio.enums.Resampling
+        )
+    return _RESAMPLING_METHODS
+
+
+def main():
     parser = argparse.ArgumentParser(
         description="Generate co-locations using .parquet file containing intersections. The kind of .parquet file used by this script is generated by Jean-François Piolle from Ifremer."
     )
@@ -39,10 +62,10 @@ def main():
     )
     parser.add_argument(
         "--minimal-area",
-        default="1600km2",
+        default=1600.0,
         nargs="?",
-        type=str,
-        help="Minimal intersection area in square kilometers.",
+        type=parse_area,
+        help="Minimal intersection area in square kilometers. A unit can be given (ex: 1600km2, 1600000000m2).",
     )
     parser.add_argument(
         "--product-generation",
@@ -51,7 +74,10 @@ def main():
         help="Generate a co-location product.",
     )
     parser.add_argument(
-        "--resampling-method", type=str, default="nearest", choices=resampling_methods
+        "--resampling-method",
+        type=str,
+        default="nearest",
+        help="Resampling method, value from rasterio.enums.Resampling.",
     )
     parser.add_argument(
         "--config",
@@ -61,7 +87,9 @@ def main():
     parser.add_argument(
         "--parallel",
         action="store_true",
-        help="Enable parallel processing on dask LocalCluster",
+        help="Enable parallel processing on dask LocalCluster. Workers are separate processes (2 threads each) "
+        "because the colocation is mostly GIL-bound Python code: memory use grows with --n-workers, but so does "
+        "the throughput.",
     )
     parser.add_argument(
         "--parallel-datarmor",
@@ -83,33 +111,30 @@ def main():
 
     args = parser.parse_args()
 
-    if args.debug:
-        logging.basicConfig(
-            level=logging.DEBUG,  # Set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-            format="%(asctime)s [%(levelname)s]: %(message)s",  # Define the log message format
-            datefmt="%Y-%m-%d %H:%M:%S",  # Define the date/time format
-        )
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.DEBUG)
-        coloc_logger = logging.getLogger("coloc_sat")
-        coloc_logger.setLevel(logging.DEBUG)
-    else:
-        logging.basicConfig(
-            level=logging.INFO,  # Set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-            format="%(asctime)s [%(levelname)s]: %(message)s",  # Define the log message format
-            datefmt="%Y-%m-%d %H:%M:%S",  # Define the date/time format
-        )
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.INFO)
-        coloc_logger = logging.getLogger("coloc_sat")
-        coloc_logger.setLevel(logging.INFO)
-
     from coloc_sat.version import __version__
 
     if args.version:
         print(__version__)
         sys.exit(0)
 
+    # rasterio is only imported once the fast exit paths are handled
+    resampling_methods = get_resampling_methods()
+    if args.resampling_method not in resampling_methods:
+        parser.error(
+            f"argument --resampling-method: invalid choice: '{args.resampling_method}' "
+            + f"(choose from {', '.join(resampling_methods)})"
+        )
+
+    level = logging.DEBUG if args.debug else logging.INFO
+    logging.basicConfig(
+        level=level,  # Set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        format="%(asctime)s [%(levelname)s]: %(message)s",  # Define the log message format
+        datefmt="%Y-%m-%d %H:%M:%S",  # Define the date/time format
+    )
+    logger = logging.getLogger(__name__)
+    logger.setLevel(level)
+    logging.getLogger("coloc_sat").setLevel(level)
+
     from coloc_sat.tools import set_config
     set_config(args.config)
 
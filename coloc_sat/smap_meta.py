@@ -1,4 +1,5 @@
 import os
+import functools
 import numpy as np
 from datetime import datetime
 import xarray as xr
@@ -16,7 +17,7 @@ class GetSmapMeta:
         self._latitude_name = "lat"
         if footprint is not None:
             self._footprint = footprint
-        self._dataset = open_nc(product_path).load()
+        self._dataset = open_nc(product_path, load=True)
         self.dataset = self.add_source_reference_attribute(ds=self.dataset)
         self.dataset = correct_dataset(self.dataset, self.longitude_name)
         self.dataset = convert_mingmt(self)
@@ -89,6 +90,7 @@ class GetSmapMeta:
             new Dataset
         """
         self._dataset = value
+        self.__dict__.pop("_time_bounds", None)
 
     @property
     def acquisition_type(self):
@@ -103,6 +105,20 @@ class GetSmapMeta:
         """
         return "daily_regular_grid"
 
+    @functools.cached_property
+    def _time_bounds(self):
+        """
+        Minimum and maximum valid times of the dataset, computed once (cache is reset when the dataset is set).
+
+        Returns
+        -------
+        (numpy.datetime64, numpy.datetime64)
+            Minimum and maximum times
+        """
+        # single reduction on the raw times (no sort), NaT of the pixels without data are skipped
+        times = self.dataset[self.time_name].values
+        return np.nanmin(times), np.nanmax(times)
+
     @property
     def start_date(self):
         """
@@ -113,7 +129,7 @@ class GetSmapMeta:
         numpy.datetime64
             Start time
         """
-        return min(np.unique(self.dataset[self.time_name]))
+        return self._time_bounds[0]
 
     @property
     def stop_date(self):
@@ -125,7 +141,7 @@ class GetSmapMeta:
         numpy.datetime64
             Stop time
         """
-        return max(np.unique(self.dataset[self.time_name]))
+        return self._time_bounds[1]
 
     @property
     def orbit_segment_name(self):
@@ -150,10 +166,7 @@ class GetSmapMeta:
         bool
             Presence or not of an orbit segmentation
         """
-        if self.orbit_segment_name is not None:
-            return True
-        else:
-            return False
+        return self.orbit_segment_name is not None
 
     @property
     def minute_name(self):
@@ -214,13 +227,13 @@ class GetSmapMeta:
         mapper = {
             self.wind_name: "wind_speed",
         }
-        for var in dataset.variables:
-            if var in mapper.keys():
-                key_in_common_vars = mapper[var]
-                dataset = dataset.rename_vars(
-                    {var: common_var_names[key_in_common_vars]}
-                )
-        return dataset
+        # single rename of all the mapped variables (a rename per variable builds a new dataset each time)
+        rename_map = {
+            var: common_var_names[key_in_common_vars]
+            for var, key_in_common_vars in mapper.items()
+            if var in dataset.variables
+        }
+        return dataset.rename_vars(rename_map)
 
     @property
     def unecessary_vars_in_coloc_product(self):
@@ -270,7 +283,7 @@ class GetSmapMeta:
         mapper = {
             "version": "sourceProductVersion",
         }
-        if attr in mapper.keys():
+        if attr in mapper:
             return mapper[attr]
         else:
             return attr
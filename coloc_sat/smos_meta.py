@@ -1,89 +1,152 @@
 from .tools import open_smos_file, correct_dataset, common_var_names
 import os
+import functools
 import numpy as np
+import xarray as xr
+
+# Attributes renamed in co-location products
+_ATTR_RENAME = {
+    "references": "reference",
+    "product_version": "sourceProductVersion",
+}
 
 
 def extract_wind_speed(smos_dataset):
-    return smos_dataset.where(~np.isnan(smos_dataset.wind_speed), drop=True)
+    wind_speed = smos_dataset.wind_speed
+    valid = np.isfinite(wind_speed.values)
+    dim_y, dim_x = wind_speed.dims
+    # only keep rows and columns with at least one valid wind speed, then mask the remaining invalid pixels
+    rows = np.flatnonzero(valid.any(axis=1))
+    cols = np.flatnonzero(valid.any(axis=0))
+    reduced = smos_dataset.isel({dim_y: rows, dim_x: cols})
+    return reduced.where(
+        xr.DataArray(valid[np.ix_(rows, cols)], dims=wind_speed.dims)
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def open_corrected_smos(product_path):
+    """
+    Lazily open a SMOS product and apply the longitude correction. Memoized by path, so that a product referenced by
+    many co-locations is only opened and corrected once.
+
+    Parameters
+    ----------
+    product_path: str
+        Path of the SMOS product
+
+    Returns
+    -------
+    xarray.Dataset
+        Corrected SMOS dataset (shared between calls, must not be modified in place)
+    """
+    dataset = open_smos_file(product_path, chunks={}).squeeze()
+    return correct_dataset(dataset, "lon")
 
 
 class GetSmosMeta:
+    # Dataset attributes kept in co-location products
+    NECESSARY_ATTRS = (
+        "Conventions",
+        "institution",
+        "title",
+        "grid_mapping",
+        "Metadata_Conventions",
+        "references",
+        "product_version",
+    )
+
     def __init__(self, product_path, product_generation=False, footprint=None):
         self.product_path = product_path
         self.product_name = os.path.basename(self.product_path)
         self.product_generation = product_generation
-        self._time_name = "measurement_time"
-        self._longitude_name = "lon"
-        self._latitude_name = "lat"
+        # names of the time, longitude and latitude variables in the dataset (plain attributes, as they are read
+        # in many hot paths)
+        self.time_name = "measurement_time"
+        self.longitude_name = "lon"
+        self.latitude_name = "lat"
         if footprint is not None:
             self._footprint = footprint
-        self._dataset = open_smos_file(product_path).squeeze().load()
-        self.dataset = correct_dataset(self.dataset, self.longitude_name)
+        # dataset is opened lazily, only needed values are read (see `ensure_loaded`)
+        self.dataset = open_corrected_smos(product_path)
+        if self.product_generation:
+            self.ensure_loaded()
+
+    def ensure_loaded(self):
+        """
+        Load the dataset values in memory. Useful before pixel-wise operations on the dataset. A (shallow) copy is
+        loaded, so that the lazy dataset shared by `open_corrected_smos` is left unchanged.
+        """
+        self._dataset = self._dataset.copy(deep=False).load()
 
     @property
     def footprint(self):
         if hasattr(self, "_footprint"):
             return self._footprint
 
-    @property
-    def start_date(self):
-        """
-        Start acquisition time
-
-        Returns
-        -------
-        numpy.datetime64
-            Start time
-        """
-        return min(np.unique(self.dataset[self.time_name]))
-
-    @property
-    def stop_date(self):
+    @functools.cached_property
+    def _time_bounds(self):
         """
-        Stop acquisition time
+        Minimum and maximum valid times of the dataset, computed once (cache is reset when the dataset is set).
 
         Returns
         -------
-        numpy.datetime64
-            Stop time
+        (numpy.datetime64, numpy.datetime64)
+            Minimum and maximum times (NaT if the dataset has no valid time)
         """
-        return max(np.unique(self.dataset[self.time_name]))
+        times = self.dataset[self.time_name].values
+        times = times[~np.isnat(times)]
+        if times.size == 0:
+            return np.datetime64("NaT"), np.datetime64("NaT")
+        return times.min(), times.max()
 
-    @property
-    def longitude_name(self):
+    @functools.cached_property
+    def footprint_bbox(self):
         """
-        Get the name of the longitude variable in the dataset
+        Bounding box of the valid pixels (with a wind speed and a time) of the dataset, computed once (cache is reset
+        when the dataset is set). The daily grid is global, so the box of the whole grid would never exclude anything.
 
         Returns
         -------
-        str
-            longitude name
-        """
-        return self._longitude_name
+        (float, float, float, float)
+            (min_lon, min_lat, max_lon, max_lat), same order as `shapely` bounds. NaN if there is no valid pixel.
+        """
+        valid = (
+            self.dataset[self.wind_name].notnull()
+            & self.dataset[self.time_name].notnull()
+        )
+        # longitudes (resp. latitudes) of the columns (resp. rows) holding at least one valid pixel
+        lon = self.dataset[self.longitude_name].where(
+            valid.any([dim for dim in valid.dims if dim != self.longitude_name])
+        )
+        lat = self.dataset[self.latitude_name].where(
+            valid.any([dim for dim in valid.dims if dim != self.latitude_name])
+        )
+        return lon.min().item(), lat.min().item(), lon.max().item(), lat.max().item()
 
     @property
-    def latitude_name(self):
+    def start_date(self):
         """
-        Get the name of the latitude variable in the dataset
+        Start acquisition time
 
         Returns
         -------
-        str
-            latitude name
+        numpy.datetime64
+            Start time
         """
-        return self._latitude_name
+        return self._time_bounds[0]
 
     @property
-    def time_name(self):
+    def stop_date(self):
         """
-        Get the name of the time variable in the dataset
+        Stop acquisition time
 
         Returns
         -------
-        str
-            time name
+        numpy.datetime64
+            Stop time
         """
-        return self._time_name
+        return self._time_bounds[1]
 
     @property
     def mission_name(self):
@@ -124,10 +187,10 @@ class GetSmosMeta:
 
         Returns
         -------
-        list[str]
+        tuple[str]
             Unecessary variables in co-location product
         """
-        return [self.time_name]
+        return (self.time_name,)
 
     @property
     def necessary_attrs_in_coloc_product(self):
@@ -136,18 +199,10 @@ class GetSmosMeta:
 
         Returns
         -------
-        list[str]
+        tuple[str]
             Necessary dataset attributes in co-location product
         """
-        return [
-            "Conventions",
-            "institution",
-            "title",
-            "grid_mapping",
-            "Metadata_Conventions",
-            "references",
-            "product_version",
-        ]
+        return self.NECESSARY_ATTRS
 
     def rename_attrs_in_coloc_product(self, attr):
         """
@@ -163,14 +218,7 @@ class GetSmosMeta:
         str
             New attribute's name from the satellite dataset.
         """
-        mapper = {
-            "references": "reference",
-            "product_version": "sourceProductVersion",
-        }
-        if attr in mapper.keys():
-            return mapper[attr]
-        else:
-            return attr
+        return _ATTR_RENAME.get(attr, attr)
 
     @property
     def acquisition_type(self):
@@ -208,6 +256,8 @@ class GetSmosMeta:
             new Dataset
         """
         self._dataset = value
+        self.__dict__.pop("_time_bounds", None)
+        self.__dict__.pop("footprint_bbox", None)
 
     @property
     def orbit_segment_name(self):
@@ -232,10 +282,7 @@ class GetSmosMeta:
         bool
             Presence or not of an orbit segmentation
         """
-        if self.orbit_segment_name is not None:
-            return True
-        else:
-            return False
+        return self.orbit_segment_name is not None
 
     @property
     def wind_name(self):
@@ -252,14 +299,6 @@ class GetSmosMeta:
 
     def lon_lat_names_setter(self, longitude=None, latitude=None):
         if longitude is not None:
-            self._longitude_name = longitude
+            self.longitude_name = longitude
         if latitude is not None:
-            self._latitude_name = latitude
-
-    @longitude_name.setter
-    def longitude_name(self, value):
-        self._longitude_name = value
-
-    @latitude_name.setter
-    def latitude_name(self, value):
-        self._latitude_name = value
+            self.latitude_name = latitude
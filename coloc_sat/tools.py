@@ -4,20 +4,21 @@ logger = logging.getLogger(__name__)
 
 import os
 import glob
+import fnmatch
+import functools
+import importlib
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import xarray as xr
 import yaml
 from shapely import wkt
 from shapely.geometry import Polygon
 import numpy as np
-import fsspec
-from datetime import datetime, timedelta
+from datetime import datetime
 from xsar.raster_readers import resource_strftime
 import re
-from numba import njit, prange
-from numba.typed import Dict
-from numba.core import types
+from numba import njit, prange, types
 
 param_config = None
 
@@ -29,65 +30,114 @@ def get_config_path():
         raise ValueError("Config is not defined")
 
 
-def load_config():
-    with open(get_config_path(), "r") as file:
+@functools.lru_cache(maxsize=8)
+def _read_config_file(config_path):
+    with open(config_path, "r") as file:
         config = yaml.safe_load(file)
     return config
 
+
+def load_config():
+    """
+    Get the content of the current configuration file. The YAML file is parsed only once per path, following calls
+    return the cached content (see `invalidate_config_cache`).
+
+    Returns
+    -------
+    dict
+        Configuration content. Must not be modified in place.
+    """
+    return _read_config_file(get_config_path())
+
+
+def invalidate_config_cache():
+    """
+    Clear the parsed configuration cache, so that the next `load_config` call reads the YAML file again.
+    """
+    _read_config_file.cache_clear()
+
+
 def set_config(config_path: str):
     global param_config
     global common_var_names
+    global common_lon_name
+    global common_lat_name
     param_config = config_path
+    invalidate_config_cache()
     common_var_names = load_config().get("common_var_names", {})
+    # reference longitude / latitude names, used for each reformatted meta object
+    common_lon_name = common_var_names.get("longitude")
+    common_lat_name = common_var_names.get("latitude")
 
 
 def get_acquisition_root_paths(ds_name):
-    paths_dict = load_config().get("paths", {})
-    logger.warning(f"Acquisition_root_paths: {paths_dict}")
-    return paths_dict[ds_name]
-
-
-def call_meta_class(file, product_generation=False, footprint=None):
-    sar_satellites = ["RS2", "S1A", "S1B", "RCM1", "RCM2", "RCM3"]
-    basename = os.path.basename(file).upper()
-    if basename.split("_")[0].split("-")[0] in sar_satellites:
-        from .sar_meta import GetSarMeta
+    """
+    Get the acquisition root paths of a dataset from the (cached) configuration.
 
-        return GetSarMeta(
-            file, product_generation=product_generation, footprint=footprint
-        )
-    elif basename.startswith("SM_"):
-        from .smos_meta import GetSmosMeta
+    Parameters
+    ----------
+    ds_name: str
+        Dataset name (key of `paths` in the configuration file)
 
-        return GetSmosMeta(
-            file, product_generation=product_generation, footprint=footprint
-        )
-    elif basename.startswith("WSAT_"):
-        from .windsat_meta import GetWindSatMeta
+    Returns
+    -------
+    list[str] | dict
+        Root paths of the dataset
+    """
+    root_paths = load_config().get("paths", {})[ds_name]
+    logger.debug("Acquisition root paths of %s: %s", ds_name, root_paths)
+    return root_paths
+
+
+# Recognition of the products from their (upper case) basename. The alternatives are tried in this order, the name of
+# the matching group is the key of `_META_CLASSES`
+_META_CLASS_RE = re.compile(
+    r"^(?:"
+    r"(?P<sar>(?:RS2|S1A|S1B|RCM1|RCM2|RCM3)(?=[-_]|$))"
+    r"|(?P<smos>SM_)"
+    r"|(?P<windsat>WSAT_)"
+    r"|(?P<smap>[^_]*_SMAP(?=_|$))"
+    r"|(?P<hy2>[^_]*_[^_]*_[^_]*_HY(?=_|$))"
+    r"|(?P<era5>ERA_5)"
+    r")"
+)
+# Meta class (module, class name) of each kind of product
+_META_CLASSES = {
+    "sar": (".sar_meta", "GetSarMeta"),
+    "smos": (".smos_meta", "GetSmosMeta"),
+    "windsat": (".windsat_meta", "GetWindSatMeta"),
+    "smap": (".smap_meta", "GetSmapMeta"),
+    "hy2": (".hy2_meta", "GetHy2Meta"),
+    "era5": (".era5_meta", "GetEra5Meta"),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_meta_class(product_kind):
+    """
+    Meta class of a kind of product. Meta modules are only imported when needed, the class is then cached.
 
-        return GetWindSatMeta(
-            file, product_generation=product_generation, footprint=footprint
-        )
-    elif basename.split("_")[1] == "SMAP":
-        from .smap_meta import GetSmapMeta
+    Parameters
+    ----------
+    product_kind: str
+        Key of `_META_CLASSES`
 
-        return GetSmapMeta(
-            file, product_generation=product_generation, footprint=footprint
-        )
-    elif basename.split("_")[3] == "HY":
-        from .hy2_meta import GetHy2Meta
+    Returns
+    -------
+    type
+        Meta class
+    """
+    module_name, class_name = _META_CLASSES[product_kind]
+    return getattr(importlib.import_module(module_name, __package__), class_name)
 
-        return GetHy2Meta(
-            file, product_generation=product_generation, footprint=footprint
-        )
-    elif basename.startswith("ERA_5"):
-        from .era5_meta import GetEra5Meta
 
-        return GetEra5Meta(
-            file, product_generation=product_generation, footprint=footprint
-        )
-    else:
+def call_meta_class(file, product_generation=False, footprint=None):
+    basename = os.path.basename(file).upper()
+    match = _META_CLASS_RE.match(basename)
+    if match is None:
         raise ValueError(f"Can't recognize satellite type from product {basename}")
+    meta_class = _get_meta_class(match.lastgroup)
+    return meta_class(file, product_generation=product_generation, footprint=footprint)
 
 
 def check_file_match_pattern_date(s_to_check: str, pattern, start_date):
@@ -95,9 +145,7 @@ def check_file_match_pattern_date(s_to_check: str, pattern, start_date):
     pattern_with_dates = insert_date_and_day_of_year(
         pattern, start_date, str(start_date.timetuple().tm_yday)
     )
-    regex_expr = re.sub(r"\*", r".*", pattern_with_dates)
-
-    return re.match(regex_expr, s_to_check) is not None
+    return compile_wildcard_expression(pattern_with_dates).match(s_to_check) is not None
 
 
 def insert_date_and_day_of_year(str_expression, datetime_obj, day_of_year):
@@ -125,6 +173,188 @@ def insert_date_and_day_of_year(str_expression, datetime_obj, day_of_year):
     return str_expression
 
 
+def read_paths_file(paths_file):
+    """
+    Read a txt file containing one product path per line.
+
+    Parameters
+    ----------
+    paths_file: str
+        Path of the txt file
+
+    Returns
+    -------
+    List[str]
+        Product paths (blank lines are ignored)
+    """
+    # the whole file is read at once and split in bytes, which is much faster than a line per line iteration
+    with open(paths_file, "rb") as file:
+        lines = file.read().splitlines()
+    return [path for path in (line.strip().decode() for line in lines) if path]
+
+
+_GLOB_MAGIC = re.compile("[*?[]")
+
+
+def _list_dir_cached(directory, dir_cache):
+    """
+    List the entry names of a directory, only once for a given `dir_cache`.
+
+    Parameters
+    ----------
+    directory: str
+        Directory path ('' for the current directory)
+    dir_cache: dict
+        Cache of the directory listings, keyed by directory path
+
+    Returns
+    -------
+    list[str]
+        Entry names. Empty if the directory doesn't exist or can't be read.
+    """
+    if directory not in dir_cache:
+        try:
+            with os.scandir(directory or os.curdir) as entries:
+                dir_cache[directory] = [entry.name for entry in entries]
+        except OSError:
+            dir_cache[directory] = []
+    return dir_cache[directory]
+
+
+def glob_with_dir_cache(expression, dir_cache):
+    """
+    Equivalent of `glob.glob` in which each directory is listed (with `os.scandir`) only once for a given
+    `dir_cache`. Many expressions built from date schemes share the same parent directories, so giving the same cache
+    for all of them avoids listing these directories again.
+
+    Parameters
+    ----------
+    expression: str
+        Glob expression (recursive `**` patterns are delegated to `glob.glob`)
+    dir_cache: dict
+        Cache of the directory listings, keyed by directory path. Shared between calls.
+
+    Returns
+    -------
+    List[str]
+        Paths matching the expression
+    """
+    if "**" in expression:
+        return glob.glob(expression)
+    parent, pattern = os.path.split(expression)
+    if not pattern:
+        return glob.glob(expression)
+    if _GLOB_MAGIC.search(parent):
+        parents = glob_with_dir_cache(parent, dir_cache)
+    else:
+        parents = [parent]
+    matches = []
+    for directory in parents:
+        names = _list_dir_cached(directory, dir_cache)
+        if _GLOB_MAGIC.search(pattern):
+            # like glob, hidden entries are only matched by patterns starting with a dot
+            if not pattern.startswith("."):
+                names = [name for name in names if not name.startswith(".")]
+            matched = fnmatch.filter(names, pattern)
+        else:
+            matched = [pattern] if pattern in names else []
+        matches.extend(os.path.join(directory, name) for name in matched)
+    return matches
+
+
+# Default number of threads used to open or read products, and maximum number inside a dask worker (which already
+# runs several threads, in each worker process)
+_DEFAULT_MAX_WORKERS = 16
+_DASK_WORKER_MAX_WORKERS = 2
+
+
+def _in_dask_worker():
+    """
+    Know if the current code runs in a dask distributed worker
+
+    Returns
+    -------
+    bool
+        True if it runs in a dask worker
+    """
+    try:
+        from distributed import get_worker
+    except ImportError:
+        return False
+    try:
+        get_worker()
+    except ValueError:
+        return False
+    return True
+
+
+def _max_workers(n_tasks):
+    """
+    Number of threads used to open or read products. It can be tuned with the `COLOC_SAT_MAX_WORKERS` environment
+    variable (a positive integer), and is capped inside a dask worker.
+
+    Parameters
+    ----------
+    n_tasks: int
+        Number of tasks to run
+
+    Returns
+    -------
+    int
+        Number of threads (at least 1)
+    """
+    env_value = os.environ.get("COLOC_SAT_MAX_WORKERS")
+    max_workers = _DEFAULT_MAX_WORKERS
+    if env_value is not None:
+        try:
+            max_workers = int(env_value)
+        except ValueError:
+            max_workers = 0
+        if max_workers < 1:
+            logger.warning(
+                "Invalid COLOC_SAT_MAX_WORKERS value %r (a positive integer is expected), %d is used",
+                env_value,
+                _DEFAULT_MAX_WORKERS,
+            )
+            max_workers = _DEFAULT_MAX_WORKERS
+    if _in_dask_worker():
+        max_workers = min(max_workers, _DASK_WORKER_MAX_WORKERS)
+    return max(1, min(max_workers, n_tasks))
+
+
+def keep_files_in_time_range(files_list, dates, start_date, stop_date):
+    """
+    Keep the files whose (start, stop) dates overlap a time range. Dates are compared as int64 ticks. Files with an
+    unknown (NaT) date are kept.
+
+    Parameters
+    ----------
+    files_list: List[str]
+        Paths of the files
+    dates: List[(numpy.datetime64, numpy.datetime64)]
+        Start and stop dates of each file
+    start_date: datetime.datetime | numpy.datetime64
+        Start of the time range
+    stop_date: datetime.datetime | numpy.datetime64
+        Stop of the time range
+
+    Returns
+    -------
+    List[str]
+        Paths of the kept files
+    """
+    if len(files_list) == 0:
+        return files_list
+    start_tick = np.datetime64(start_date, "ns").astype(np.int64)
+    stop_tick = np.datetime64(stop_date, "ns").astype(np.int64)
+    dates = np.array(dates, dtype="datetime64[ns]")
+    ticks = dates.view(np.int64)
+    keep = ((ticks[:, 1] >= start_tick) & (ticks[:, 0] <= stop_tick)) | np.isnat(
+        dates
+    ).any(axis=1)
+    return [f for f, kept in zip(files_list, keep) if kept]
+
+
 def get_all_comparison_files(
     start_date=None,
     stop_date=None,
@@ -162,17 +392,18 @@ def get_all_comparison_files(
         Path of all existing products
     """
 
+    if isinstance(input_ds, str):
+        # read the txt file once, not for each searched expression
+        input_ds = read_paths_file(input_ds)
+
+    # directory listings shared by all the searched expressions
+    dir_cache = {}
+
     def research_files(expression):
         if (input_ds is not None) and isinstance(input_ds, list):
             return match_expression_in_list(expression=expression, str_list=input_ds)
-        elif (input_ds is not None) and isinstance(input_ds, str):
-            with open(input_ds, "r") as file:
-                lines = file.readlines()
-            file.close()
-            files_list = [line.strip() for line in lines]
-            return match_expression_in_list(expression=expression, str_list=files_list)
         elif input_ds is None:
-            return glob.glob(expression)
+            return glob_with_dir_cache(expression, dir_cache)
         else:
             raise ValueError("Type of input_ds must be a list or None")
 
@@ -192,62 +423,23 @@ def get_all_comparison_files(
 
         """
 
-        def extract_smos_sort_keys(string):
-            """
-            From a SMOS path, extract the orbit (Ascending or Descending), the date and the generation number. It is
-            used to sort a list of SMOS paths
-
-            Parameters
-            ----------
-            string: str
-                SMOS path
-
-            Returns
-            -------
-            (str, int, int)
-                Primary and secondary sort keys (orbit, date, generation number)
-            """
-            basename = os.path.basename(string)
-            key1 = basename.split("_")[-5]
-            key2 = int(basename.split("_")[-4])
-            key3 = int(basename.split("_")[-2])
-            return key1, key2, key3
-
-        if len(files_list) == 0:
-            return files_list
-        else:
-            final_files = []
-            sorted_files = sorted(files_list, key=extract_smos_sort_keys)
-            last_generation_file = sorted_files[0]
-            for index, file in enumerate(sorted_files):
-                # prefix is the same when only the generation is different
-                prefix = "_".join(os.path.basename(file).split("_")[:-2])
-                if prefix == "_".join(
-                    os.path.basename(last_generation_file).split("_")[:-2]
-                ):
-                    # if the generation is greater, we increase the reference generation
-                    if (
-                        extract_smos_sort_keys(file)[2]
-                        >= extract_smos_sort_keys(last_generation_file)[2]
-                    ):
-                        last_generation_file = file
-                else:
-                    final_files.append(last_generation_file)
-                    last_generation_file = file
-                # The last files isn't added when it is a new product, so we add it
-                if index == len(sorted_files) - 1:
-                    final_files.append(file)
-            return final_files
+        # basenames are split once, the sort keys and the prefix (same when only the generation is different)
+        # are derived from these parts
+        decorated = []
+        for file in files_list:
+            parts = os.path.basename(file).split("_")
+            sort_keys = (parts[-5], int(parts[-4]), int(parts[-2]))
+            decorated.append((sort_keys, "_".join(parts[:-2]), file))
+        # sort on (orbit, date, generation number)
+        decorated.sort(key=lambda item: item[0])
+        # files grouped by prefix: as the generations are increasing, the last file kept for a prefix has the
+        # greatest generation
+        last_generation_files = {}
+        for _, prefix, file in decorated:
+            last_generation_files[prefix] = file
+        return list(last_generation_files.values())
 
     map_levels = {1: "L1", 2: "L2"}
-    if accuracy == "day":
-        match_date_patt = "%Y%m%d"
-    elif accuracy == "hour":
-        match_date_patt = "%Y%m%d%H"
-    elif accuracy == "minute":
-        match_date_patt = "%Y%m%d%H%M"
-    elif accuracy == "second":
-        match_date_patt = "%Y%m%d%H%M%S"
 
     root_paths = get_acquisition_root_paths(ds_name)
     product_levels = []
@@ -257,68 +449,50 @@ def get_all_comparison_files(
         product_levels = list(root_paths.keys())
     files = []
     schemes = date_schemes(start_date, stop_date, accuracy=accuracy)
+    # dates of the schemes, computed once for all the root paths
+    scheme_dates = [(tmp_dic["_dt"], tmp_dic["dayOfYear"]) for tmp_dic in schemes.values()]
+
+    def research_scheme_files(root_path):
+        found = []
+        for date, day_of_year in scheme_dates:
+            parsed_path = insert_date_and_day_of_year(
+                str_expression=root_path,
+                datetime_obj=date,
+                day_of_year=day_of_year,
+            )
+            found += research_files(parsed_path)
+        return found
+
     if ds_name == "SMOS":
         # get all netcdf files which contain the days in schemes
         for root_path in root_paths:
-            for scheme in schemes:
-                date = datetime.strptime(scheme, match_date_patt)
-                parsed_path = insert_date_and_day_of_year(
-                    str_expression=root_path,
-                    datetime_obj=date,
-                    day_of_year=schemes[scheme]["dayOfYear"],
-                )
-                files += research_files(parsed_path)
+            files += research_scheme_files(root_path)
         files = get_last_generation_files(files)
     elif ds_name == "HY2":
         # get all netcdf files which contain the days in schemes
         for root_path in root_paths:
-            for scheme in schemes:
-                date = datetime.strptime(scheme, match_date_patt)
-                parsed_path = insert_date_and_day_of_year(
-                    str_expression=root_path,
-                    datetime_obj=date,
-                    day_of_year=schemes[scheme]["dayOfYear"],
-                )
-                files += research_files(parsed_path)
+            files += research_scheme_files(root_path)
         if (start_date is not None) and (stop_date is not None):
             # remove files for which hour doesn't correspond to the selected times
-            for f in files.copy():
-                start_hy, stop_hy = extract_start_stop_dates_from_hy(f)
-                if (stop_hy < start_date) or (start_hy > stop_date):
-                    files.remove(f)
-    elif ds_name == "S1":
-        for lvl in product_levels:
-            for root_path in root_paths[lvl]:
-                for scheme in schemes:
-                    date = datetime.strptime(scheme, match_date_patt)
-                    parsed_path = insert_date_and_day_of_year(
-                        str_expression=root_path,
-                        datetime_obj=date,
-                        day_of_year=schemes[scheme]["dayOfYear"],
+            hy_dates = [_start_stop_dates_from_hy_name(file) for file in files]
+            unnamed = [file for file, dates in zip(files, hy_dates) if dates is None]
+            if unnamed:
+                # dates missing from the filenames are read from the netCDF files, in threads so that the file
+                # accesses overlap
+                with ThreadPoolExecutor(
+                    max_workers=_max_workers(len(unnamed))
+                ) as executor:
+                    read_dates = iter(
+                        list(executor.map(extract_start_stop_dates_from_hy, unnamed))
                     )
-                    files += research_files(parsed_path)
-    elif ds_name == "RS2":
+                hy_dates = [
+                    next(read_dates) if dates is None else dates for dates in hy_dates
+                ]
+            files = keep_files_in_time_range(files, hy_dates, start_date, stop_date)
+    elif ds_name in ["S1", "RS2", "RCM"]:
         for lvl in product_levels:
             for root_path in root_paths[lvl]:
-                for scheme in schemes:
-                    date = datetime.strptime(scheme, match_date_patt)
-                    parsed_path = insert_date_and_day_of_year(
-                        str_expression=root_path,
-                        datetime_obj=date,
-                        day_of_year=schemes[scheme]["dayOfYear"],
-                    )
-                    files += research_files(parsed_path)
-    elif ds_name == "RCM":
-        for lvl in product_levels:
-            for root_path in root_paths[lvl]:
-                for scheme in schemes:
-                    date = datetime.strptime(scheme, match_date_patt)
-                    parsed_path = insert_date_and_day_of_year(
-                        str_expression=root_path,
-                        datetime_obj=date,
-                        day_of_year=schemes[scheme]["dayOfYear"],
-                    )
-                    files += research_files(parsed_path)
+                files += research_scheme_files(root_path)
     elif ds_name == "ERA5":
         for root_path in root_paths:
             if (start_date is not None) and (stop_date is not None):
@@ -332,38 +506,63 @@ def get_all_comparison_files(
                     .replace("%M", "*")
                     .replace("%S", "*")
                 )
-    elif ds_name == "WS":
+    elif ds_name in ["WS", "SMAP"]:
         for root_path in root_paths:
-            for scheme in schemes:
-                date = datetime.strptime(scheme, match_date_patt)
-                parsed_path = insert_date_and_day_of_year(
-                    str_expression=root_path,
-                    datetime_obj=date,
-                    day_of_year=schemes[scheme]["dayOfYear"],
-                )
-                files += research_files(parsed_path)
-    elif ds_name == "SMAP":
-        for root_path in root_paths:
-            for scheme in schemes:
-                date = datetime.strptime(scheme, match_date_patt)
-                parsed_path = insert_date_and_day_of_year(
-                    str_expression=root_path,
-                    datetime_obj=date,
-                    day_of_year=schemes[scheme]["dayOfYear"],
-                )
-                files += research_files(parsed_path)
+            files += research_scheme_files(root_path)
     if (start_date is not None) and (stop_date is not None):
         if ds_name in ["S1", "RS2", "RCM"]:
-            for f in files.copy():
-                start, stop = extract_start_stop_dates_from_sar(f)
-                if (stop < start_date) or (start > stop_date):
-                    files.remove(f)
+            # dates are parsed from the filenames, then compared all at once
+            sar_dates = [extract_start_stop_dates_from_sar(f) for f in files]
+            files = keep_files_in_time_range(files, sar_dates, start_date, stop_date)
     return files
 
 
+@functools.lru_cache(maxsize=1024)
+def compile_wildcard_expression(expression):
+    """
+    Compile an expression in which `*` is a wildcard into a regular expression. Memoized, as the same expressions are
+    matched against many paths.
+
+    Parameters
+    ----------
+    expression: str
+        Expression with `*` wildcards
+
+    Returns
+    -------
+    re.Pattern
+        Compiled regular expression (to be used with `match`)
+    """
+    return re.compile(re.sub(r"\*", r".*", expression))
+
+
 def match_expression_in_list(expression, str_list):
-    regex_expr = re.sub(r"\*", r".*", expression)
-    return [path for path in str_list if re.match(regex_expr, path)]
+    return list(filter(compile_wildcard_expression(expression).match, str_list))
+
+
+@functools.lru_cache(maxsize=4096)
+def _era5_filename(resource, step, timestamp):
+    """
+    Memoized `resource_strftime` filename.
+
+    Parameters
+    ----------
+    resource: str
+        resource string, with strftime template
+    step: int
+        hour step between 2 files
+    timestamp: int
+        Date, in seconds since epoch
+
+    Returns
+    -------
+    str
+        ERA5 file
+    """
+    closest_date, filename = resource_strftime(
+        resource, step=step, date=datetime.utcfromtimestamp(timestamp)
+    )
+    return filename
 
 
 def get_nearest_era5_files(start_date, stop_date, resource, step=1):
@@ -386,22 +585,76 @@ def get_nearest_era5_files(start_date, stop_date, resource, step=1):
     list[str]
         Concerned ERA5 files
     """
-    files = []
-    date = start_date.astype("datetime64[ns]")
-    while date < stop_date:
-        datetime_date = datetime.utcfromtimestamp(date.astype(int) * 1e-9)
-        closest_date, filename = resource_strftime(
-            resource, step=step, date=datetime_date
+    start = start_date.astype("datetime64[ns]")
+    stop = np.datetime64(stop_date, "ns")
+    if start >= stop:
+        return []
+    # `resource_strftime` rounds dates to whole hours, so the files found with a date every `step` minutes are also
+    # found with a date every hour from `start_date`, plus the last of these dates before `stop_date`
+    interval = np.timedelta64(step, "m")
+    last = start + ((stop - start - np.timedelta64(1, "ns")) // interval) * interval
+    dates = np.append(np.arange(start, last, np.timedelta64(1, "h")), last)
+    # `resource_strftime` only depends on the hour of (date + step / 2): dates are replaced by a representative of
+    # this hour, so that the filenames are cached across calls with overlapping windows
+    half_step = np.timedelta64(step * 30, "m")
+    # (the dates are increasing, consecutive duplicates are dropped before any filename lookup)
+    representatives = (dates + half_step).astype("datetime64[h]") - half_step
+    timestamps = representatives.astype("datetime64[s]").astype(np.int64)
+    timestamps = timestamps[np.r_[True, timestamps[1:] != timestamps[:-1]]]
+    # dict used as an insertion-ordered set of the files
+    return list(
+        dict.fromkeys(
+            _era5_filename(resource, step, int(timestamp)) for timestamp in timestamps
         )
-        if filename not in files:
-            files.append(filename)
-        date += np.timedelta64(step, "m")
-    return files
+    )
+
 
+# the values of a dimension coordinate are read-only (pandas index), so both layouts are compiled
+@njit(
+    [
+        types.UniTuple(types.float64, 2)(types.Array(types.float64, 1, "C")),
+        types.UniTuple(types.float64, 2)(
+            types.Array(types.float64, 1, "C", readonly=True)
+        ),
+    ],
+    cache=True,
+)
+def nan_min_max(values):
+    """
+    Minimum and maximum of an array in a single pass, NaN values being skipped.
 
-def cross_antemeridian(dataset):
+    Parameters
+    ----------
+    values: numpy.ndarray
+        1D array
+
+    Returns
+    -------
+    (float, float)
+        Minimum and maximum (NaN if all the values are NaN)
+    """
+    minimum = np.inf
+    maximum = -np.inf
+    found = False
+    for value in values:
+        if not np.isnan(value):
+            found = True
+            if value < minimum:
+                minimum = value
+            if value > maximum:
+                maximum = value
+    if not found:
+        return np.nan, np.nan
+    return minimum, maximum
+
+
+def cross_antemeridian(dataset, lon_name="lon"):
     """True if footprint cross antemeridian"""
-    return ((np.max(dataset.lon) - np.min(dataset.lon)) > 180).item()
+    # single pass reduction on the underlying array (NaN are skipped, as xarray does), without xarray dispatch
+    lon_min, lon_max = nan_min_max(
+        np.ascontiguousarray(dataset[lon_name].values, dtype=np.float64).ravel()
+    )
+    return bool((lon_max - lon_min) > 180)
 
 
 def correct_dataset(dataset, lon_name="lon"):
@@ -413,69 +666,106 @@ def correct_dataset(dataset, lon_name="lon"):
     ----------
     dataset: xarray.Dataset
         Acquisition dataset
-    lon_name: str
-        name of the longitude dimension in the dataset. `lon` by default.
+    lon_name: str | list[str]
+        name of the longitude dimension in the dataset. `lon` by default. Several longitude names can be given, so that
+        they are all corrected in a single pass.
 
     Returns
     -------
     xarray.Dataset
         Acquisition dataset depending on longitude and latitude.
     """
+    lon_names = [lon_name] if isinstance(lon_name, str) else list(lon_name)
+    # longitudes shifted on the underlying arrays, then put back in copies of the original variables, all at once
+    new_coords = {}
+    for name in lon_names:
+        lon = dataset[name]
+        lon_values = lon.values
+        if cross_antemeridian(dataset, name):
+            lon_values = (lon_values + 180) % 360
+        new_coords[name] = lon.copy(data=lon_values - 180)
+    dataset = dataset.assign_coords(**new_coords)
+    sort_names = [name for name in lon_names if dataset[name].ndim == 1]
+    if len(sort_names) > 0:
+        dataset = dataset.sortby(sort_names)
+    return dataset
 
-    def cross_antemeridian(ds):
-        """True if footprint cross antemeridian"""
-        return ((np.max(ds[lon_name]) - np.min(ds[lon_name])) > 180).item()
 
-    lon = dataset[lon_name]
-    if cross_antemeridian(dataset):
-        lon = (lon + 180) % 360
-    dataset = dataset.assign_coords(**{lon_name: lon - 180})
-    if dataset[lon_name].ndim == 1:
-        dataset = dataset.sortby(lon_name)
-    return dataset
+def downcast_float64(dataset):
+    """
+    Convert the float64 data variables of a dataset to float32. Coordinates and variables of other types (times,
+    boolean masks, ...) are kept as they are.
+
+    Parameters
+    ----------
+    dataset: xarray.Dataset
+        Acquisition dataset
+
+    Returns
+    -------
+    xarray.Dataset
+        Dataset with float32 data variables instead of float64 ones
+    """
+    float64_vars = [
+        name for name, var in dataset.data_vars.items() if var.dtype == np.float64
+    ]
+    if len(float64_vars) == 0:
+        return dataset
+    return dataset.assign(
+        {name: dataset[name].astype(np.float32) for name in float64_vars}
+    )
 
 
 def date_schemes(start_date, stop_date, accuracy="day"):
     schemes = {}
 
     if start_date and stop_date:
-        date = start_date
-        increment_map = {
-            "day": timedelta(days=1),
-            "hour": timedelta(hours=1),
-            "minute": timedelta(minutes=1),
-            "second": timedelta(seconds=1),
-        }
-
-        if accuracy not in increment_map:
+        unit_map = {"day": "D", "hour": "h", "minute": "m", "second": "s"}
+
+        if accuracy not in unit_map:
             raise ValueError(
                 "Invalid accuracy value. Choose from 'day', 'hour', 'minute', 'second'"
             )
 
-        increment = increment_map[accuracy]
+        unit = unit_map[accuracy]
+        # dates from start_date to stop_date, every accuracy unit, computed at once (wall clock time, the time zone is
+        # not used in the schemes)
+        start = np.datetime64(start_date.replace(tzinfo=None), "us")
+        stop = np.datetime64(stop_date.replace(tzinfo=None), "us")
+        dates = np.arange(start, stop + np.timedelta64(1, "us"), np.timedelta64(1, unit))
+        # fields below the accuracy are reset in the date stored with each scheme
+        truncated_dates = (
+            dates.astype(f"datetime64[{unit}]").astype("datetime64[us]").astype(object)
+        )
 
-        while date <= stop_date:
-            scheme_date = date.strftime("%Y%m%d")
-            year = date.strftime("%Y")
-            month = date.strftime("%m")
-            day_of_year = date.strftime("%j")
+        for date in truncated_dates:
+            # strings built from the date fields (cheaper than strftime calls)
+            year = f"{date.year:04d}"
+            month = f"{date.month:02d}"
+            day_of_year = f"{date.timetuple().tm_yday:03d}"
+            scheme_date = f"{year}{month}{date.day:02d}"
 
-            tmp_dic = {"year": year, "dayOfYear": str(day_of_year), "month": month}
+            tmp_dic = {
+                "year": year,
+                "dayOfYear": day_of_year,
+                "month": month,
+                "_dt": date,
+            }
 
             if accuracy == "hour":
-                hour = date.strftime("%H")
+                hour = f"{date.hour:02d}"
                 tmp_dic["hour"] = hour
                 scheme = scheme_date + hour
             elif accuracy == "minute":
-                hour = date.strftime("%H")
-                minute = date.strftime("%M")
+                hour = f"{date.hour:02d}"
+                minute = f"{date.minute:02d}"
                 tmp_dic["hour"] = hour
                 tmp_dic["minute"] = minute
                 scheme = scheme_date + hour + minute
             elif accuracy == "second":
-                hour = date.strftime("%H")
-                minute = date.strftime("%M")
-                second = date.strftime("%S")
+                hour = f"{date.hour:02d}"
+                minute = f"{date.minute:02d}"
+                second = f"{date.second:02d}"
                 tmp_dic["hour"] = hour
                 tmp_dic["minute"] = minute
                 tmp_dic["second"] = second
@@ -484,17 +774,84 @@ def date_schemes(start_date, stop_date, accuracy="day"):
                 scheme = scheme_date
 
             schemes[scheme] = tmp_dic
-            date += increment
     else:
-        schemes = {"*": {"year": "*", "dayOfYear": "*", "month": "*"}}
+        schemes = {"*": {"year": "*", "dayOfYear": "*", "month": "*", "_dt": None}}
 
     return schemes
 
 
+# start and stop dates in a filename (ex: `_20211231T225616_20220101T004101_`)
+_START_STOP_NAME_RE = re.compile(r"_(\d{8})T?(\d{6})_(\d{8})T?(\d{6})_")
+
+
 def extract_start_stop_dates_from_hy(product_path):
+    """
+    Get the start and stop dates of a HY2 product. They are parsed from the filename when it contains both of them,
+    else they are read from the time variable of the product (KNMI filenames only contain the start date).
+    The dates read from a product are memoized by path and modification time, so a product rewritten in place is read
+    again.
+
+    Parameters
+    ----------
+    product_path: str
+        path of the product
+
+    Returns
+    -------
+    np.datetime64, np.datetime64
+        Tuple that contains the start and the stop dates (NaT if the product has no valid time)
+    """
+    dates = _start_stop_dates_from_hy_name(product_path)
+    if dates is not None:
+        return dates
+    return _read_start_stop_dates_from_hy(product_path, os.stat(product_path).st_mtime_ns)
+
+
+def _start_stop_dates_from_hy_name(product_path):
+    """
+    Parse the start and stop dates of a HY2 product from its filename.
+
+    Parameters
+    ----------
+    product_path: str
+        path of the product
+
+    Returns
+    -------
+    (np.datetime64, np.datetime64) | None
+        Tuple that contains the start and the stop dates, None if the filename doesn't contain both of them
+    """
+    match = _START_STOP_NAME_RE.search(os.path.basename(product_path))
+    if match is None:
+        return None
+    start_day, start_time, stop_day, stop_time = match.groups()
+    return parse_date(start_day + start_time), parse_date(stop_day + stop_time)
+
+
+@functools.lru_cache(maxsize=1024)
+def _read_start_stop_dates_from_hy(product_path, mtime_ns):
+    """
+    Read the start and stop dates of a HY2 product from its time variable.
+
+    Parameters
+    ----------
+    product_path: str
+        path of the product
+    mtime_ns: int
+        Modification time of the product, only used as a cache key
+
+    Returns
+    -------
+    np.datetime64, np.datetime64
+        Tuple that contains the start and the stop dates (NaT if the product has no valid time)
+    """
     ds = GetHy2Meta._open_nc(product_path)
-    unique_time = np.unique(ds.time)
-    return min(unique_time), max(unique_time)
+    # min / max reductions, there is no need to sort the times
+    times = np.asarray(ds.time.values)
+    times = times[~np.isnat(times)]
+    if times.size == 0:
+        return np.datetime64("NaT"), np.datetime64("NaT")
+    return times.min(), times.max()
 
 
 def parse_date(date):
@@ -635,14 +992,15 @@ def open_l2(product_path):
         Level 2 SAR product
     """
     nc_product = find_l2_nc(product_path)
-
-    fs = fsspec.filesystem("file")
-    return xr.open_dataset(fs.open(nc_product), engine="h5netcdf")
+    # local path given directly to the backend (no python file object wrapper)
+    return xr.open_dataset(nc_product, engine="h5netcdf")
 
 
+@functools.lru_cache(maxsize=256)
 def convert_str_to_polygon(poly_str):
     """
-    Convert a string to a shapely Polygon object.
+    Convert a string to a shapely Polygon object. Memoized, the same footprint string is often converted many times
+    (shapely geometries are immutable, so the result can be shared).
 
     Parameters
     ----------
@@ -675,17 +1033,17 @@ def get_l2_footprint(dataset):
     if "footprint" in dataset.attrs:
         return convert_str_to_polygon(dataset.attrs["footprint"])
     else:
-        footprint_dict = {}
-        for ll in ["owiLon", "owiLat"]:
-            footprint_dict[ll] = [
-                dataset[ll].isel(owiAzSize=a, owiRaSize=x).values
-                for a, x in [(0, 0), (0, -1), (-1, -1), (-1, 0)]
-            ]
-        corners = list(zip(footprint_dict["owiLon"], footprint_dict["owiLat"]))
+        # corners are read with numpy indexing on the (azimuth, range) arrays
+        lon = np.asarray(dataset["owiLon"].transpose("owiAzSize", "owiRaSize").values)
+        lat = np.asarray(dataset["owiLat"].transpose("owiAzSize", "owiRaSize").values)
+        corners = [
+            (float(lon[a, x]), float(lat[a, x]))
+            for a, x in [(0, 0), (0, -1), (-1, -1), (-1, 0)]
+        ]
         return Polygon(corners)
 
 
-def open_nc(product_path):
+def open_nc(product_path, load=False, chunks=None):
     """
     Open a netcdf file using `xarray.open_dataset`
 
@@ -693,17 +1051,24 @@ def open_nc(product_path):
     ----------
     product_path: str
         Absolute path to the netcdf
+    load: bool
+        If True, the whole content is read into memory and the file is closed right away (`xarray.load_dataset`),
+        instead of being read lazily from the open file.
+    chunks: dict | str | None
+        Passed to `xarray.open_dataset`. If not None, the dataset is opened lazily with dask arrays (ignored if `load`
+        is True).
 
     Returns
     -------
     xarray.Dataset
         netcdf content
     """
-    fs = fsspec.filesystem("file")
-    return xr.open_dataset(fs.open(product_path))
+    if load:
+        return xr.load_dataset(product_path)
+    return xr.open_dataset(product_path, chunks=chunks)
 
 
-def open_smos_file(product_path):
+def open_smos_file(product_path, chunks=None):
     """
     Open a smos file as a dataset
 
@@ -711,14 +1076,43 @@ def open_smos_file(product_path):
     ----------
     product_path: str
         Path to the smos product that must be opened
+    chunks: dict | None
+        Passed to `xarray.open_dataset`. If not None, the dataset is opened lazily with dask arrays.
 
     Returns
     -------
     xarray.Dataset
         Smos product
     """
-    fs = fsspec.filesystem("file")
-    return xr.open_dataset(fs.open(product_path), engine="h5netcdf")
+    return xr.open_dataset(product_path, engine="h5netcdf", chunks=chunks)
+
+
+@njit(parallel=True, cache=True)
+def mingmt_to_datetime64(minutes, day_ns):
+    """
+    Convert minutes since midnight GMT to dates, as nanoseconds since epoch (`numpy.datetime64[ns]` integer view).
+
+    Parameters
+    ----------
+    minutes: numpy.ndarray
+        1D float64 array of minutes since midnight GMT (NaN if no data). Fractions of minute are truncated.
+    day_ns: int
+        Midnight of the day, in nanoseconds since epoch
+
+    Returns
+    -------
+    numpy.ndarray
+        1D int64 array of nanoseconds since epoch (NaT value if no data)
+    """
+    nat = np.iinfo(np.int64).min
+    out = np.empty(minutes.size, dtype=np.int64)
+    for i in prange(minutes.size):
+        minute = minutes[i]
+        if np.isnan(minute):
+            out[i] = nat
+        else:
+            out[i] = day_ns + np.int64(minute) * 60_000_000_000
+    return out
 
 
 def convert_mingmt(meta_acquisition):
@@ -738,13 +1132,20 @@ def convert_mingmt(meta_acquisition):
     """
     ds = meta_acquisition.dataset
     input_time = ds[meta_acquisition.minute_name]
+    day = np.array(meta_acquisition.day_date, dtype="datetime64[ns]")
     if (np.dtype(input_time) == np.dtype("float64")) or (
         np.dtype(input_time) == np.dtype(int)
     ):
-        input_time = input_time.astype("timedelta64[m]")
-    ds[meta_acquisition.time_name] = (
-        np.array(meta_acquisition.day_date, dtype="datetime64[ns]") + input_time
-    )
+        # minutes converted in a single compiled pass, the result is viewed as dates without copy
+        minutes = np.ascontiguousarray(input_time.values, dtype=np.float64)
+        dates = mingmt_to_datetime64(minutes.ravel(), day.astype(np.int64).item())
+        ds[meta_acquisition.time_name] = (
+            input_time.dims,
+            dates.view("datetime64[ns]").reshape(minutes.shape),
+            input_time.attrs,
+        )
+    else:
+        ds[meta_acquisition.time_name] = day + input_time
     return ds.drop_vars([meta_acquisition.minute_name])
 
 
@@ -849,80 +1250,299 @@ def reformat_meta(meta):
             return meta
     ds = meta.dataset
     # rename longitude, latitude by references name and modify concerned attributes in the metaobjects
-    if meta.longitude_name != common_var_names["longitude"]:
-        ds = ds.rename({meta.longitude_name: common_var_names["longitude"]})
-    if meta.latitude_name != common_var_names["latitude"]:
-        ds = ds.rename({meta.latitude_name: common_var_names["latitude"]})
+    renames = {}
+    if meta.longitude_name != common_lon_name:
+        renames[meta.longitude_name] = common_lon_name
+    if meta.latitude_name != common_lat_name:
+        renames[meta.latitude_name] = common_lat_name
+    if renames:
+        ds = ds.rename(renames)
     meta.dataset = ds
-    meta.longitude_name = common_var_names["longitude"]
-    meta.latitude_name = common_var_names["latitude"]
+    meta.longitude_name = common_lon_name
+    meta.latitude_name = common_lat_name
     return meta
 
 
-@njit
-def point_in_polygon(x, y, polygon):
-    n = len(polygon)
+# The polygon kernels work on float64 coordinates (C-contiguous edge arrays, any layout for the 2D lon/lat grids).
+# The serial helpers have explicit signatures, and all the kernels are cached on disk so that the compilation is not
+# paid again by each process. The parallel kernels are compiled lazily, to keep the import of this module fast.
+@njit("UniTuple(float64[::1], 5)(float64[:, :])", cache=True)
+def polygon_edges(polygon):
+    """
+    Split polygon coordinates into contiguous arrays of edges (struct of arrays), with the inverse of each edge
+    latitude extent precomputed (0 for horizontal edges, which are never crossed).
+
+    Parameters
+    ----------
+    polygon: numpy.ndarray
+        Polygon coordinates, shape (n, 2)
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Start longitudes, start latitudes, end longitudes, end latitudes and inverse latitude extents of the edges
+    """
+    n = polygon.shape[0]
+    x0 = np.empty(n)
+    y0 = np.empty(n)
+    x1 = np.empty(n)
+    y1 = np.empty(n)
+    inv_dy = np.zeros(n)
+    for i in range(n):
+        # edge from the previous vertex to the current one, the first edge closes the ring
+        x0[i] = polygon[i - 1, 0]
+        y0[i] = polygon[i - 1, 1]
+        x1[i] = polygon[i, 0]
+        y1[i] = polygon[i, 1]
+        if y1[i] != y0[i]:
+            inv_dy[i] = 1.0 / (y1[i] - y0[i])
+    return x0, y0, x1, y1, inv_dy
+
+
+@njit(
+    "boolean(float64, float64, float64[::1], float64[::1], float64[::1], float64[::1], float64[::1])",
+    cache=True,
+)
+def point_in_polygon(x, y, x0, y0, x1, y1, inv_dy):
     inside = False
-    px, py = polygon[0]
-    for i in range(n + 1):
-        sx, sy = polygon[i % n]
-        if y > min(py, sy):
-            if y <= max(py, sy):
-                if x <= max(px, sx):
-                    if py != sy:
-                        xinters = (y - py) * (sx - px) / (sy - py) + px
-                    if px == sx or x <= xinters:
-                        inside = not inside
-        px, py = sx, sy
+    for i in range(x0.size):
+        px = x0[i]
+        py = y0[i]
+        sx = x1[i]
+        sy = y1[i]
+        # branchless crossing number: the edge spans y (half-open, so horizontal edges never count) and the
+        # crossing is at the right of x
+        xinters = (y - py) * (sx - px) * inv_dy[i] + px
+        inside ^= ((py < y) != (sy < y)) & (x <= max(px, sx)) & (x <= xinters)
     return inside
 
 
-@njit(parallel=True)
-def filter_data_polygon(lon, lat, data_vars, polygon):
-    mask = np.zeros(lon.shape, dtype=np.bool_)
-    for i in prange(lon.shape[0]):
-        for j in range(lon.shape[1]):
-            mask[i, j] = point_in_polygon(lon[i, j], lat[i, j], polygon)
+# Size (in pixels) of the square tiles traversed by `polygon_mask`
+POLYGON_MASK_TILE_SIZE = 64
+
 
-    for var in data_vars:
-        data_vars[var] = np.where(mask, data_vars[var], np.nan)
+@njit(parallel=True, cache=True)
+def polygon_mask(lon, lat, polygon):
+    """
+    Mask of the points located inside a polygon. The grid is traversed by tiles: tiles whose bounding box doesn't
+    intersect this of the polygon are skipped, and the remaining points outside the polygon bounding box are rejected
+    before the crossing number test.
 
-    filtered_indices = np.argwhere(mask)
-    if filtered_indices.size == 0:
+    Parameters
+    ----------
+    lon: numpy.ndarray
+        2D longitudes
+    lat: numpy.ndarray
+        2D latitudes
+    polygon: numpy.ndarray
+        Polygon coordinates, shape (n, 2)
+
+    Returns
+    -------
+    numpy.ndarray
+        2D boolean mask, True inside the polygon
+    """
+    x0, y0, x1, y1, inv_dy = polygon_edges(polygon)
+    tile_size = POLYGON_MASK_TILE_SIZE
+    xmin = x1.min()
+    xmax = x1.max()
+    ymin = y1.min()
+    ymax = y1.max()
+    n_rows, n_cols = lon.shape
+    mask = np.zeros(lon.shape, dtype=np.bool_)
+    n_tiles_cols = (n_cols + tile_size - 1) // tile_size
+    n_tiles = ((n_rows + tile_size - 1) // tile_size) * n_tiles_cols
+    for t in prange(n_tiles):
+        row_start = (t // n_tiles_cols) * tile_size
+        col_start = (t % n_tiles_cols) * tile_size
+        row_stop = min(row_start + tile_size, n_rows)
+        col_stop = min(col_start + tile_size, n_cols)
+        # tile bounding box (NaN are ignored by the comparisons)
+        tile_xmin = np.inf
+        tile_xmax = -np.inf
+        tile_ymin = np.inf
+        tile_ymax = -np.inf
+        for i in range(row_start, row_stop):
+            for j in range(col_start, col_stop):
+                if lon[i, j] < tile_xmin:
+                    tile_xmin = lon[i, j]
+                if lon[i, j] > tile_xmax:
+                    tile_xmax = lon[i, j]
+                if lat[i, j] < tile_ymin:
+                    tile_ymin = lat[i, j]
+                if lat[i, j] > tile_ymax:
+                    tile_ymax = lat[i, j]
+        if (
+            tile_xmax < xmin
+            or tile_xmin > xmax
+            or tile_ymax <= ymin
+            or tile_ymin > ymax
+        ):
+            continue
+        for i in range(row_start, row_stop):
+            for j in range(col_start, col_stop):
+                x = lon[i, j]
+                y = lat[i, j]
+                if x < xmin or x > xmax or y <= ymin or y > ymax:
+                    continue
+                mask[i, j] = point_in_polygon(x, y, x0, y0, x1, y1, inv_dy)
+    return mask
+
+
+@njit(cache=True)
+def filter_data_polygon(lon, lat, data, polygon):
+    mask = polygon_mask(lon, lat, polygon)
+
+    # rows and columns holding at least one pixel of the polygon (mask.any(axis=...) is not supported by numba)
+    rows_any = np.zeros(mask.shape[0], dtype=np.bool_)
+    cols_any = np.zeros(mask.shape[1], dtype=np.bool_)
+    for i in range(mask.shape[0]):
+        for j in range(mask.shape[1]):
+            if mask[i, j]:
+                rows_any[i] = True
+                cols_any[j] = True
+    if not rows_any.any():
         print("Filtering using polygon left no data.")
-        return data_vars, None, None
+        return data, None, None
 
     # Get the minimum and maximum row and column indices
-    min_row = filtered_indices[0, 0]
-    min_col = filtered_indices[0, 1]
-    max_row = filtered_indices[0, 0]
-    max_col = filtered_indices[0, 1]
-
-    for idx in filtered_indices:
-        if idx[0] < min_row:
-            min_row = idx[0]
-        if idx[1] < min_col:
-            min_col = idx[1]
-        if idx[0] > max_row:
-            max_row = idx[0]
-        if idx[1] > max_col:
-            max_col = idx[1]
+    min_row = rows_any.argmax()
+    max_row = len(rows_any) - 1 - rows_any[::-1].argmax()
+    min_col = cols_any.argmax()
+    max_col = len(cols_any) - 1 - cols_any[::-1].argmax()
 
     # Extract the subarrays from the original lon/lat arrays
     lon_2d_reduced = lon[min_row : max_row + 1, min_col : max_col + 1]
     lat_2d_reduced = lat[min_row : max_row + 1, min_col : max_col + 1]
 
-    # Extract the subarrays for each variable in data_vars
-    data_vars_reduced = {}
-    for var in data_vars:
-        data_vars_reduced[var] = data_vars[var][
-            min_row : max_row + 1, min_col : max_col + 1
-        ]
+    # Extract the subarray of the variables (stacked along the last axis) with a single slice, and mask it in place
+    # outside the polygon (only the bounding box of the polygon is masked, the pixels outside of it are dropped anyway)
+    mask_reduced = mask[min_row : max_row + 1, min_col : max_col + 1]
+    data_reduced = data[min_row : max_row + 1, min_col : max_col + 1, :]
+    for i in range(data_reduced.shape[0]):
+        for j in range(data_reduced.shape[1]):
+            if not mask_reduced[i, j]:
+                data_reduced[i, j, :] = np.nan
+
+    return data_reduced, lon_2d_reduced, lat_2d_reduced
+
+
+def geometry_edges(geometry):
+    """
+    Edges of all the rings (exteriors and interiors) of a Polygon or a MultiPolygon, concatenated in the layout
+    returned by `polygon_edges`. With the even-odd rule of `point_in_polygon`, holes and disjoint parts are handled
+    without distinguishing the rings.
 
-    return data_vars_reduced, lon_2d_reduced, lat_2d_reduced
+    Parameters
+    ----------
+    geometry: shapely.geometry.Polygon | shapely.geometry.MultiPolygon
+        Geometry to split into edges
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Start longitudes, start latitudes, end longitudes, end latitudes and inverse latitude extents of the edges
+    """
+    polygons = getattr(geometry, "geoms", [geometry])
+    rings = [
+        ring
+        for polygon in polygons
+        for ring in [polygon.exterior, *polygon.interiors]
+        if not ring.is_empty
+    ]
+    if not rings:
+        return tuple(np.empty(0) for _ in range(5))
+    edges = [
+        polygon_edges(np.ascontiguousarray(np.asarray(ring.coords)[:, :2], dtype=np.float64))
+        for ring in rings
+    ]
+    return tuple(np.concatenate(arrays) for arrays in zip(*edges))
+
+
+@njit(parallel=True, cache=True)
+def regular_grid_polygon_mask(
+    lon_min, lon_res, n_lon, lat_min, lat_res, n_lat, x0, y0, x1, y1, inv_dy
+):
+    """
+    Rasterize a polygon on a regular grid: a cell is inside the polygon if its center is (same rule as
+    `rasterio.features.rasterize`). Only the cells whose center is in the polygon bounding box are tested, and the
+    mask is returned with the row and column bounds of the cells inside the polygon.
+
+    Parameters
+    ----------
+    lon_min: float
+        Longitude of the lower edge of the grid (the first cell center is at `lon_min + lon_res / 2`)
+    lon_res: float
+        Longitude resolution
+    n_lon: int
+        Number of columns (longitudes)
+    lat_min: float
+        Latitude of the lower edge of the grid (the first cell center is at `lat_min + lat_res / 2`)
+    lat_res: float
+        Latitude resolution
+    n_lat: int
+        Number of rows (latitudes)
+    x0, y0, x1, y1, inv_dy: numpy.ndarray
+        Polygon edges, as returned by `polygon_edges` or `geometry_edges`
+
+    Returns
+    -------
+    (int, int, int, int, numpy.ndarray)
+        Start and stop rows, start and stop columns, and the 2D boolean mask of the cells inside the polygon within
+        these bounds. All the bounds are 0 if no cell is inside the polygon.
+    """
+    row_lo = 0
+    row_hi = 0
+    col_lo = 0
+    col_hi = 0
+    xmin = xmax = ymin = ymax = 0.0
+    if x1.size > 0:
+        xmin = x1.min()
+        xmax = x1.max()
+        ymin = y1.min()
+        ymax = y1.max()
+        # cells whose center can be in the bounding box of the polygon
+        col_lo = max(int(np.floor((xmin - lon_min) / lon_res - 0.5)), 0)
+        col_hi = min(int(np.ceil((xmax - lon_min) / lon_res - 0.5)) + 1, n_lon)
+        row_lo = max(int(np.floor((ymin - lat_min) / lat_res - 0.5)), 0)
+        row_hi = min(int(np.ceil((ymax - lat_min) / lat_res - 0.5)) + 1, n_lat)
+    n_rows = max(row_hi - row_lo, 0)
+    n_cols = max(col_hi - col_lo, 0)
+    mask = np.zeros((n_rows, n_cols), dtype=np.bool_)
+    for i in prange(n_rows):
+        y = lat_min + (row_lo + i + 0.5) * lat_res
+        if y <= ymin or y > ymax:
+            continue
+        for j in range(n_cols):
+            x = lon_min + (col_lo + j + 0.5) * lon_res
+            if x < xmin or x > xmax:
+                continue
+            mask[i, j] = point_in_polygon(x, y, x0, y0, x1, y1, inv_dy)
+
+    # shrink the bounds to the rows and columns holding at least one cell of the polygon
+    first_row = n_rows
+    last_row = 0
+    first_col = n_cols
+    last_col = 0
+    for i in range(n_rows):
+        for j in range(n_cols):
+            if mask[i, j]:
+                first_row = min(first_row, i)
+                last_row = i + 1
+                first_col = min(first_col, j)
+                last_col = max(last_col, j + 1)
+    if last_row == 0:
+        return 0, 0, 0, 0, np.zeros((0, 0), dtype=np.bool_)
+    return (
+        row_lo + first_row,
+        row_lo + last_row,
+        col_lo + first_col,
+        col_lo + last_col,
+        mask[first_row:last_row, first_col:last_col].copy(),
+    )
 
 
-@njit
+@njit(cache=True)
 def haversine(lat1, lon1, lat2, lon2):
     # Radius of the Earth in kilometers
     R = 6371.0
@@ -949,46 +1569,231 @@ def haversine(lat1, lon1, lat2, lon2):
     return distance
 
 
-@njit(parallel=True)
+@njit("float64(float64, float64, float64, float64, float64, float64)", cache=True)
+def haversine_chord(lat1_rad, lon1_rad, cos_lat1, lat2_rad, lon2_rad, cos_lat2):
+    """
+    Square of the half chord between two points (the `a` term of the haversine formula). It grows with the distance,
+    so that comparing it to `sin(radius / (2 * R)) ** 2` is equivalent to comparing the haversine distance to the
+    radius, without the square root and arctangent.
+
+    Parameters
+    ----------
+    lat1_rad: float
+        Latitude of the first point, in radians
+    lon1_rad: float
+        Longitude of the first point, in radians
+    cos_lat1: float
+        Cosine of the latitude of the first point
+    lat2_rad: float
+        Latitude of the second point, in radians
+    lon2_rad: float
+        Longitude of the second point, in radians
+    cos_lat2: float
+        Cosine of the latitude of the second point
+
+    Returns
+    -------
+    float
+        Square of the half chord between the two points
+    """
+    sin_dlat = np.sin((lat2_rad - lat1_rad) / 2)
+    sin_dlon = np.sin((lon2_rad - lon1_rad) / 2)
+    return sin_dlat * sin_dlat + cos_lat1 * cos_lat2 * sin_dlon * sin_dlon
+
+
+# no explicit signature: the coordinates can be writable or read-only (values of xarray coordinates,
+# memory-mapped data), with any layout
+@njit(cache=True)
+def latitude_band_index(lon, lat, band_height):
+    """
+    Index of the valid points of a grid, sorted by latitude band and by longitude within each band. The points close to
+    a location are then searched with a binary search in a longitude window of the neighbouring bands, instead of in
+    the whole grid.
+
+    Parameters
+    ----------
+    lon: numpy.ndarray
+        2D longitudes
+    lat: numpy.ndarray
+        2D latitudes
+    band_height: float
+        Height of the latitude bands, in degrees
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        Flat indices of the points with valid coordinates, sorted, and their sort keys
+        `band * 360 + (lon + 180) % 360`
+    """
+    lon_f = lon.ravel()
+    lat_f = lat.ravel()
+    valid = np.flatnonzero(~(np.isnan(lon_f) | np.isnan(lat_f)))
+    keys = (
+        np.floor((lat_f[valid] + 90) / band_height) * 360
+        + (lon_f[valid] + 180) % 360
+    )
+    sort = np.argsort(keys)
+    return valid[sort], keys[sort]
+
+
+@njit(parallel=True, cache=True)
 def compute_colocated_data(
     lon_1,
     lat_1,
     lon_2,
     lat_2,
-    data_vars_1,
-    data_vars_2,
+    data_1,
+    data_2,
     min_px,
-    colocated_data_1,
-    colocated_data_2,
-    main_var_name_1,
+    main_var_index_1,
     radius_km,
 ):
+    """
+    Associate to each pixel of grid 1 the mean of the grid 2 pixels located within a radius.
+
+    Parameters
+    ----------
+    lon_1: numpy.ndarray
+        2D longitudes of grid 1 (the reference grid)
+    lat_1: numpy.ndarray
+        2D latitudes of grid 1
+    lon_2: numpy.ndarray
+        2D longitudes of grid 2
+    lat_2: numpy.ndarray
+        2D latitudes of grid 2
+    data_1: numpy.ndarray
+        Variables of grid 1, stacked along the last axis (shape (rows_1, cols_1, n_vars_1))
+    data_2: numpy.ndarray
+        Variables of grid 2, stacked along the last axis (shape (rows_2, cols_2, n_vars_2))
+    min_px: int
+        Minimum number of grid 2 pixels within the radius for a grid 1 pixel to be colocated
+    main_var_index_1: int
+        Index in data_1 of the reference variable: grid 2 is not averaged where it is NaN. -1 if there is none.
+    radius_km: float
+        Radius of the association, in kilometers
 
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        Colocated variables of grid 1 and grid 2 on grid 1, stacked along the last axis. NaN where there is no
+        colocation.
+    """
+    n_vars_2 = data_2.shape[2]
+    colocated_data_1 = np.full(data_1.shape, np.nan)
+    colocated_data_2 = np.full((lon_1.shape[0], lon_1.shape[1], n_vars_2), np.nan)
+
+    # the great circle distance between two points is at least their latitude difference: with bands of dlat
+    # degrees, the grid 2 points within the radius of a grid 1 point are in its band or in the two adjacent ones (the
+    # bands are slightly enlarged against rounding errors)
+    dlat = np.degrees(radius_km / 6371.0)
+    band_height = dlat * (1 + 1e-6)
+    order, sorted_keys = latitude_band_index(lon_2, lat_2, band_height)
+
+    # grid 2 is copied in the order of the index, so that the window of a grid 1 point is read contiguously (and
+    # stays in cache for the next pixels of the row, whose windows mostly overlap). The copies stay in float64: in
+    # float32 they are converted back in each chord computation, which is slower, and the variables can hold times
+    # in nanoseconds.
+    sorted_lat = lat_2.ravel()[order]
+    sorted_lon = lon_2.ravel()[order]
+    sorted_data = np.ascontiguousarray(data_2).reshape(-1, n_vars_2)[order]
+
+    # trigonometry of the grids computed once, and radius expressed as a squared half chord
+    lat_1_rad = np.radians(lat_1)
+    lon_1_rad = np.radians(lon_1)
+    cos_lat_1 = np.cos(lat_1_rad)
+    sorted_lat_rad = np.radians(sorted_lat)
+    sorted_lon_rad = np.radians(sorted_lon)
+    sorted_cos_lat = np.cos(sorted_lat_rad)
+    max_chord = np.sin(radius_km / (2 * 6371.0)) ** 2
+    sin_radius = np.sin(radius_km / 6371.0)
+
+    # only the rows are distributed over the threads (a nested prange is run serially), each thread reuses its own
+    # running sums and search windows along a row
     for i in prange(lon_1.shape[0]):
-        for j in prange(lon_1.shape[1]):
-            filtered_indices = []
-            for m in prange(lon_2.shape[0]):
-                for n in prange(lon_2.shape[1]):
-                    dist = haversine(lat_1[i, j], lon_1[i, j], lat_2[m, n], lon_2[m, n])
-                    if dist <= radius_km:
-                        filtered_indices.append((m, n))
-
-            if len(filtered_indices) < min_px:
+        sums = np.empty(n_vars_2)
+        counts = np.empty(n_vars_2, dtype=np.int64)
+        window_starts = np.empty(2)
+        window_stops = np.empty(2)
+        for j in range(lon_1.shape[1]):
+            # running sums of the non NaN grid 2 values located within the radius (nanmean computed on the fly)
+            sums[:] = 0.0
+            counts[:] = 0
+            n_filtered = 0
+            # where the reference variable is NaN, grid 2 is not averaged: the search only has to find min_px
+            # neighbours (grid 1 values are still kept if there are enough of them)
+            ref_nan = main_var_index_1 >= 0 and np.isnan(data_1[i, j, main_var_index_1])
+            search_done = False
+            if np.isnan(lon_1[i, j]) or np.isnan(lat_1[i, j]):
+                n_bands = 0
+            else:
+                band = np.floor((lat_1[i, j] + 90) / band_height)
+                n_bands = 3
+
+            # longitude windows [start, stop[ (in [0, 360[, split in two across the antimeridian) of the spherical cap
+            # of radius_km around the point, or the whole bands if the cap holds a pole
+            n_windows = 1
+            if n_bands > 0 and abs(lat_1[i, j]) + dlat < 90:
+                dlon = np.degrees(np.arcsin(sin_radius / cos_lat_1[i, j])) + 1e-7
+                lon_wrapped = (lon_1[i, j] + 180) % 360
+                window_starts[0] = max(lon_wrapped - dlon, 0.0)
+                window_stops[0] = min(lon_wrapped + dlon, 360.0)
+                if lon_wrapped - dlon < 0:
+                    window_starts[1] = lon_wrapped - dlon + 360
+                    window_stops[1] = 360.0
+                    n_windows = 2
+                elif lon_wrapped + dlon > 360:
+                    window_starts[1] = 0.0
+                    window_stops[1] = lon_wrapped + dlon - 360
+                    n_windows = 2
+            else:
+                window_starts[0] = 0.0
+                window_stops[0] = 360.0
+
+            for b in range(n_bands):
+                if search_done:
+                    break
+                band_key = (band - 1 + b) * 360
+                for w in range(n_windows):
+                    if search_done:
+                        break
+                    start = np.searchsorted(
+                        sorted_keys, band_key + window_starts[w], side="left"
+                    )
+                    stop = np.searchsorted(
+                        sorted_keys, band_key + window_stops[w], side="left"
+                    )
+                    for k in range(start, stop):
+                        chord = haversine_chord(
+                            lat_1_rad[i, j],
+                            lon_1_rad[i, j],
+                            cos_lat_1[i, j],
+                            sorted_lat_rad[k],
+                            sorted_lon_rad[k],
+                            sorted_cos_lat[k],
+                        )
+                        if chord <= max_chord:
+                            n_filtered += 1
+                            if ref_nan:
+                                if n_filtered >= min_px:
+                                    search_done = True
+                                    break
+                                continue
+                            for v in range(n_vars_2):
+                                value = sorted_data[k, v]
+                                if not np.isnan(value):
+                                    sums[v] += value
+                                    counts[v] += 1
+
+            if n_filtered < min_px:
                 continue
 
-            ref_nan = False
-            for coloc_1_var in data_vars_1:
-                if coloc_1_var == main_var_name_1:
-                    ref_nan = np.isnan(data_vars_1[coloc_1_var][i, j])
-                colocated_data_1[coloc_1_var][i, j] = data_vars_1[coloc_1_var][i, j]
+            colocated_data_1[i, j, :] = data_1[i, j, :]
+            if ref_nan:
+                continue
 
-            for coloc_2_var in data_vars_2:
-                if not ref_nan:
-                    filtered_data = np.array(
-                        [data_vars_2[coloc_2_var][m, n] for m, n in filtered_indices]
-                    )
-                    mean_filtered_data = np.nanmean(filtered_data)
-                    colocated_data_2[coloc_2_var][i, j] = mean_filtered_data
+            for v in range(n_vars_2):
+                if counts[v] > 0:
+                    colocated_data_2[i, j, v] = sums[v] / counts[v]
 
     return colocated_data_1, colocated_data_2
 
@@ -28,6 +28,7 @@
 from .bytemaps import sys
 from .bytemaps import Dataset
 from .bytemaps import Verify
+import numpy as np
 import xarray as xr
 
 
@@ -42,7 +43,8 @@ def to_xarray_dataset(raw):
 
     def to_tuple(var):
         dims = var.coordinates
-        data = var  # the Variable class is a subclass of ndarray
+        # plain ndarray view on the decoded variable (the Variable class is a subclass of ndarray)
+        data = np.asarray(var)
         attrs = {name: getattr(var, name) for name in raw._attributes() if name not in ["coordinates"]}
         return dims, data, attrs
 
@@ -1,8 +1,9 @@
 import os
+import functools
 import numpy as np
 from datetime import datetime
 
-from .tools import correct_dataset, convert_mingmt, common_var_names
+from .tools import correct_dataset, convert_mingmt, common_var_names, downcast_float64
 from .windsat_daily_v7 import WindSatDaily, to_xarray_dataset
 
 
@@ -14,9 +15,8 @@ class GetWindSatMeta:
         self._time_name = 'time'
         self._longitude_name = 'longitude'
         self._latitude_name = 'latitude'
-        self._dataset = to_xarray_dataset(WindSatDaily(product_path, np.nan)).load()
-        self.dataset = correct_dataset(self.dataset, self.longitude_name)
-        self.dataset = convert_mingmt(self)
+        # the daily grid is only decoded when the dataset is first needed (see `dataset`)
+        self._dataset = None
 
     @property
     def longitude_name(self):
@@ -54,16 +54,29 @@ class GetWindSatMeta:
         """
         return self._time_name
 
+    def _load_dataset(self):
+        """
+        Decode the daily grid of the product and format it (longitudes and times) as `self._dataset`
+        """
+        # the grid is decoded into numpy arrays, the dataset is built on them without any load / copy
+        self._dataset = to_xarray_dataset(WindSatDaily(self.product_path, np.nan))
+        self._dataset = correct_dataset(self._dataset, self.longitude_name)
+        self._dataset = convert_mingmt(self)
+        # the daily grid values are decoded from bytes with a precision far below float32
+        self._dataset = downcast_float64(self._dataset)
+
     @property
     def dataset(self):
         """
-        Getter for the acquisition dataset
+        Getter for the acquisition dataset. The product is decoded on first access.
 
         Returns
         -------
         xarray.Dataset
             Acquisition dataset
         """
+        if self._dataset is None:
+            self._load_dataset()
         return self._dataset
 
     @dataset.setter
@@ -77,8 +90,9 @@ class GetWindSatMeta:
             new Dataset
         """
         self._dataset = value
+        self.__dict__.pop('_time_bounds', None)
 
-    @property
+    @functools.cached_property
     def day_date(self):
         """
         Get day date from the product name as a datetime
@@ -91,7 +105,7 @@ class GetWindSatMeta:
         str_date = self.product_name.split('_')[1].split('v')[0]
         return datetime.strptime(str_date, '%Y%m%d')
 
-    @property
+    @functools.cached_property
     def minute_name(self):
         """
         Get name of the minute variable in the dataset
@@ -103,7 +117,7 @@ class GetWindSatMeta:
         """
         return 'mingmt'
 
-    @property
+    @functools.cached_property
     def acquisition_type(self):
         """
         Gives the acquisition type (swath, truncated_swath,daily_regular_grid, model_regular_grid)
@@ -116,6 +130,20 @@ class GetWindSatMeta:
         """
         return 'daily_regular_grid'
 
+    @functools.cached_property
+    def _time_bounds(self):
+        """
+        Minimum and maximum valid times of the dataset, computed once (cache is reset when the dataset is set).
+
+        Returns
+        -------
+        (numpy.datetime64, numpy.datetime64)
+            Minimum and maximum times
+        """
+        # single reduction on the raw times (no sort), NaT of the pixels without data are skipped
+        times = self.dataset[self.time_name].values
+        return np.nanmin(times), np.nanmax(times)
+
     @property
     def start_date(self):
         """
@@ -126,7 +154,7 @@ class GetWindSatMeta:
         numpy.datetime64
             Start time
         """
-        return min(np.unique(self.dataset[self.time_name]))
+        return self._time_bounds[0]
 
     @property
     def stop_date(self):
@@ -138,9 +166,9 @@ class GetWindSatMeta:
         numpy.datetime64
             Stop time
         """
-        return max(np.unique(self.dataset[self.time_name]))
+        return self._time_bounds[1]
 
-    @property
+    @functools.cached_property
     def orbit_segment_name(self):
         """
         Gives the name of the variable for orbit segmentation in dataset (Ascending / Descending). If value is None,
@@ -153,7 +181,7 @@ class GetWindSatMeta:
         """
         return 'orbit_segment'
 
-    @property
+    @functools.cached_property
     def has_orbited_segmentation(self):
         """
         True if there is orbit segmentation in the dataset
@@ -163,12 +191,9 @@ class GetWindSatMeta:
         bool
             Presence or not of an orbit segmentation
         """
-        if self.orbit_segment_name is not None:
-            return True
-        else:
-            return False
+        return self.orbit_segment_name is not None
 
-    @property
+    @functools.cached_property
     def wind_name(self):
         """
         Name of an important wind variable in the dataset
@@ -181,7 +206,7 @@ class GetWindSatMeta:
         """
         return 'wdir'
 
-    @property
+    @functools.cached_property
     def mission_name(self):
         """
         Get the mission name (ex : RADARSAT-2, RCM, SENTINEL-1, SMOS, SMAP,...)
@@ -215,11 +240,13 @@ class GetWindSatMeta:
             self.wind_name: 'wind_direction',
             'w-mf': 'wind_speed',
         }
-        for var in dataset.variables:
-            if var in mapper.keys():
-                key_in_common_vars = mapper[var]
-                dataset = dataset.rename_vars({var: common_var_names[key_in_common_vars]})
-        return dataset
+        # single rename of all the mapped variables (a rename per variable builds a new dataset each time)
+        rename_map = {
+            var: common_var_names[key_in_common_vars]
+            for var, key_in_common_vars in mapper.items()
+            if var in dataset.variables
+        }
+        return dataset.rename_vars(rename_map)
 
     @property
     def unecessary_vars_in_coloc_product(self):
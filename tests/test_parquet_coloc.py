@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+"""Tests for `coloc_sat.parquet_coloc`."""
+
+
+import os
+import tempfile
+import unittest
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from coloc_sat.parquet_coloc import iter_parquet_batches, iter_parquet_rows
+
+
+class TestIterParquetRows(unittest.TestCase):
+    """Tests for `iter_parquet_rows` on a small parquet file."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.parquet = os.path.join(self.tmp_dir.name, "colocations.parquet")
+        start = pd.Timestamp("2020-01-01T00:00")
+        minutes = pd.Timedelta(minutes=1)
+        # (ref granule, match granule, match start delay in minutes, disjoint geometries). The best rows of match_y
+        # and match_z have the same time difference, match_z appears first in the file but its best row is after.
+        rows = [
+            ("ref_a", "match_z", 30, False),
+            ("ref_a", "match_y", -10, False),
+            ("ref_b", "match_x", 20, False),
+            ("ref_c", "match_z", 5, True),
+            ("ref_b", "match_y", 20, False),
+            ("ref_c", "match_x", 50, False),
+            ("ref_a", "match_z", 10, False),
+        ]
+        self.df = gpd.GeoDataFrame(
+            {
+                "ref_granule": [row[0] for row in rows],
+                "match_granule": [row[1] for row in rows],
+                "ref_start": [start] * len(rows),
+                "ref_end": [start + 20 * minutes] * len(rows),
+                "match_start": [start + row[2] * minutes for row in rows],
+                "match_end": [start + (row[2] + 20) * minutes for row in rows],
+                "ref_geometry": gpd.GeoSeries([box(0, 0, 2, 2)] * len(rows)),
+                "match_geometry": gpd.GeoSeries(
+                    [box(5, 5, 6, 6) if row[3] else box(1, 1, 3, 3) for row in rows]
+                ),
+                "unused": np.arange(len(rows)),
+            },
+            geometry="ref_geometry",
+            crs="EPSG:4326",
+        )
+        self.df["match_geometry"] = self.df["match_geometry"].set_crs("EPSG:4326")
+        self.df.to_parquet(self.parquet)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def granules(self, **kwargs):
+        return [
+            (row["ref_granule"], row["match_granule"])
+            for row in iter_parquet_rows(
+                self.parquet, destination_folder="out", batch_size=2, **kwargs
+            )
+        ]
+
+    def test_batches(self):
+        batches = list(iter_parquet_batches(self.parquet, batch_size=3))
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        batch = batches[0]
+        self.assertNotIn("unused", batch.columns)
+        for col in ("ref_geometry", "match_geometry"):
+            self.assertEqual(batch[col].dtype, "geometry")
+            self.assertEqual(batch[col].array.crs, "EPSG:4326")
+
+    def test_rows(self):
+        """Rows are yielded in the parquet order, without the disjoint geometries."""
+        rows = list(
+            iter_parquet_rows(self.parquet, destination_folder="out", batch_size=2)
+        )
+        self.assertEqual(
+            [(row["ref_granule"], row["match_granule"]) for row in rows],
+            [
+                (ref, match)
+                for ref, match, disjoint in zip(
+                    self.df["ref_granule"],
+                    self.df["match_granule"],
+                    self.df["match_geometry"].disjoint(self.df["ref_geometry"]),
+                )
+                if not disjoint
+            ],
+        )
+        self.assertTrue(all(row["destination_folder"] == "out" for row in rows))
+
+    def test_filter_dataset_unique(self):
+        """Same rows and order as a stable sort on the time difference followed by `drop_duplicates`."""
+        df = self.df[self.df.intersects(self.df["match_geometry"])].copy()
+        df["time_diff"] = (df["ref_start"] - df["match_start"]).abs()
+        df = df.sort_values(by=["time_diff"], kind="stable")
+        for dataset in ("ref", "match"):
+            with self.subTest(filter_dataset_unique=dataset):
+                expected = df.drop_duplicates(subset=[f"{dataset}_granule"])
+                self.assertEqual(
+                    self.granules(filter_dataset_unique=dataset),
+                    list(zip(expected["ref_granule"], expected["match_granule"])),
+                )
+
+    def test_unsupported_filter(self):
+        with self.assertRaises(ValueError):
+            self.granules(filter_dataset_unique="both")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+"""Tests for `coloc_sat.smos_meta`."""
+
+
+import os
+import unittest
+
+import numpy as np
+import xarray as xr
+
+from coloc_sat import tools
+
+# meta modules read the common variable names of the configuration when they are imported
+tools.set_config(os.path.join(os.path.dirname(tools.__file__), "config.yml"))
+
+from coloc_sat.smos_meta import GetSmosMeta  # noqa: E402
+
+
+def smos_meta_from_dataset(dataset):
+    """Build a `GetSmosMeta` around an in-memory dataset, without opening a product."""
+    meta = GetSmosMeta.__new__(GetSmosMeta)
+    meta.time_name = "measurement_time"
+    meta.longitude_name = "lon"
+    meta.latitude_name = "lat"
+    meta.dataset = dataset
+    return meta
+
+
+def smos_dataset(times):
+    times = np.asarray(times, dtype="datetime64[ns]")
+    return xr.Dataset(
+        {"measurement_time": (("lat", "lon"), times.reshape(1, -1))},
+        coords={"lat": [0.0], "lon": np.arange(times.size, dtype=float)},
+    )
+
+
+class TestSmosTimeBounds(unittest.TestCase):
+    """Tests for `GetSmosMeta` start and stop dates."""
+
+    def test_time_bounds_skip_nat(self):
+        meta = smos_meta_from_dataset(
+            smos_dataset(["NaT", "2020-01-01T06:00", "NaT", "2020-01-01T02:00"])
+        )
+        self.assertEqual(meta.start_date, np.datetime64("2020-01-01T02:00", "ns"))
+        self.assertEqual(meta.stop_date, np.datetime64("2020-01-01T06:00", "ns"))
+
+    def test_time_bounds_without_valid_time(self):
+        """All-NaT and empty datasets give NaT bounds instead of raising."""
+        for times in [["NaT", "NaT"], []]:
+            meta = smos_meta_from_dataset(smos_dataset(times))
+            self.assertTrue(np.isnat(meta.start_date))
+            self.assertTrue(np.isnat(meta.stop_date))
+
+
+class TestSmosFootprintBbox(unittest.TestCase):
+    """Tests for `GetSmosMeta.footprint_bbox`."""
+
+    def setUp(self):
+        lon = np.arange(-179.5, 180, 1.0)
+        lat = np.arange(-89.5, 90, 1.0)
+        wind_speed = np.full((lat.size, lon.size), np.nan)
+        times = np.full((lat.size, lon.size), np.datetime64("NaT", "ns"))
+        # valid pixels between 10.5 and 20.5 E, -5.5 and 3.5 N
+        wind_speed[84:94, 190:201] = 7.0
+        times[84:94, 190:201] = np.datetime64("2020-01-01T06:00", "ns")
+        # a wind speed without time and a time without wind speed are not valid
+        wind_speed[150, 10] = 7.0
+        times[20, 300] = np.datetime64("2020-01-01T06:00", "ns")
+        self.dataset = xr.Dataset(
+            {
+                "wind_speed": (("lat", "lon"), wind_speed),
+                "measurement_time": (("lat", "lon"), times),
+            },
+            coords={"lat": lat, "lon": lon},
+        )
+
+    def test_bbox_of_valid_pixels(self):
+        meta = smos_meta_from_dataset(self.dataset)
+        self.assertEqual(meta.footprint_bbox, (10.5, -5.5, 20.5, 3.5))
+
+    def test_bbox_reset_with_dataset(self):
+        meta = smos_meta_from_dataset(self.dataset)
+        meta.footprint_bbox
+        meta.dataset = self.dataset.where(self.dataset.lon > 15)
+        self.assertEqual(meta.footprint_bbox, (15.5, -5.5, 20.5, 3.5))
+
+    def test_bbox_without_valid_pixel(self):
+        meta = smos_meta_from_dataset(self.dataset.where(self.dataset.lon > 100))
+        self.assertTrue(np.isnan(meta.footprint_bbox).all())
+
+
+class TestSmosEnsureLoaded(unittest.TestCase):
+    def test_shared_dataset_stays_lazy(self):
+        """The dataset shared by `open_corrected_smos` is not loaded in place."""
+        shared = smos_dataset(["2020-01-01T06:00", "NaT"]).chunk()
+        meta = smos_meta_from_dataset(shared)
+        meta.ensure_loaded()
+        self.assertIsNone(meta.dataset.measurement_time.chunks)
+        self.assertIsNotNone(shared.measurement_time.chunks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python
+
+"""Tests for `coloc_sat.tools`."""
+
+
+import os
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import numpy as np
+import shapely
+from shapely.geometry import MultiPolygon, Polygon
+
+from xsar.raster_readers import resource_strftime
+
+from coloc_sat.tools import (
+    _max_workers,
+    _start_stop_dates_from_hy_name,
+    compute_colocated_data,
+    filter_data_polygon,
+    geometry_edges,
+    get_nearest_era5_files,
+    keep_files_in_time_range,
+    latitude_band_index,
+    polygon_mask,
+    regular_grid_polygon_mask,
+)
+
+
+def random_polygon(rng, x_center, y_center, radius, n_vertices=12):
+    """Random star-shaped (so valid) polygon."""
+    angles = np.sort(rng.uniform(0, 2 * np.pi, n_vertices))
+    radii = radius * rng.uniform(0.3, 1.0, n_vertices)
+    return Polygon(
+        np.column_stack(
+            [x_center + radii * np.cos(angles), y_center + radii * np.sin(angles)]
+        )
+    )
+
+
+def brute_force_colocation(
+    lon_1, lat_1, lon_2, lat_2, data_1, data_2, min_px, main_var_index_1, radius_km
+):
+    """Reference `compute_colocated_data`: haversine distance from each grid 1 pixel to every grid 2 pixel."""
+    colocated_data_1 = np.full(data_1.shape, np.nan)
+    colocated_data_2 = np.full(lon_1.shape + (data_2.shape[2],), np.nan)
+    lat_2_rad = np.radians(lat_2)
+    lon_2_rad = np.radians(lon_2)
+    for i, j in np.ndindex(lon_1.shape):
+        lat_rad = np.radians(lat_1[i, j])
+        lon_rad = np.radians(lon_1[i, j])
+        a = np.sin((lat_2_rad - lat_rad) / 2) ** 2 + np.cos(lat_rad) * np.cos(
+            lat_2_rad
+        ) * np.sin((lon_2_rad - lon_rad) / 2) ** 2
+        distance = 2 * 6371.0 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        with np.errstate(invalid="ignore"):
+            within = distance <= radius_km
+        if within.sum() < min_px:
+            continue
+        colocated_data_1[i, j] = data_1[i, j]
+        if main_var_index_1 >= 0 and np.isnan(data_1[i, j, main_var_index_1]):
+            continue
+        for v in range(data_2.shape[2]):
+            values = data_2[within, v]
+            values = values[~np.isnan(values)]
+            if values.size:
+                colocated_data_2[i, j, v] = values.mean()
+    return colocated_data_1, colocated_data_2
+
+
+class TestLatitudeBandIndex(unittest.TestCase):
+    """Tests for `latitude_band_index`."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.lon = rng.uniform(-180, 180, (20, 30))
+        self.lat = rng.uniform(-90, 90, (20, 30))
+        self.lon[0, 0] = np.nan
+
+    def test_readonly_inputs(self):
+        """Read-only coordinates (xarray coordinates, memory-mapped data) give the same index."""
+        order, keys = latitude_band_index(self.lon, self.lat, 1.0)
+        lon = self.lon.copy()
+        lat = self.lat.copy()
+        lon.flags.writeable = False
+        lat.flags.writeable = False
+        for lon_in, lat_in in [(lon, lat), (lon, self.lat), (self.lon, lat)]:
+            readonly_order, readonly_keys = latitude_band_index(lon_in, lat_in, 1.0)
+            np.testing.assert_array_equal(readonly_order, order)
+            np.testing.assert_array_equal(readonly_keys, keys)
+        # the point with a NaN longitude is not indexed
+        self.assertEqual(order.size, self.lon.size - 1)
+
+
+class TestComputeColocatedData(unittest.TestCase):
+    """`compute_colocated_data` against a brute force haversine search."""
+
+    radius_km = 150.0
+
+    def grids(self, lat_center, lon_center, spread=3.0):
+        rng = np.random.default_rng(0)
+
+        def grid(size):
+            lon = lon_center + rng.uniform(-spread, spread, (size, size))
+            lat = lat_center + rng.uniform(-spread, spread, (size, size))
+            return (lon + 180) % 360 - 180, np.clip(lat, -89.9, 89.9)
+
+        lon_1, lat_1 = grid(12)
+        lon_2, lat_2 = grid(30)
+        # NaN coordinates on both grids
+        lon_1[0, 0] = np.nan
+        lat_1[0, 1] = np.nan
+        lat_2[1, 1] = np.nan
+        lon_2[2, 2] = np.nan
+        data_1 = rng.random((12, 12, 2))
+        # NaN reference pixels (first variable)
+        data_1[rng.random((12, 12)) < 0.2, 0] = np.nan
+        data_2 = rng.random((30, 30, 3))
+        data_2[rng.random((30, 30, 3)) < 0.2] = np.nan
+        return lon_1, lat_1, lon_2, lat_2, data_1, data_2
+
+    def assert_same_as_brute_force(self, lat_center, lon_center, spread=3.0):
+        grids = self.grids(lat_center, lon_center, spread)
+        # large min_px values leave some pixels without colocation, and stop the search early on NaN reference pixels
+        for min_px in (1, 5, 40):
+            for main_var_index_1 in (0, -1):
+                with self.subTest(min_px=min_px, main_var_index_1=main_var_index_1):
+                    args = grids + (min_px, main_var_index_1, self.radius_km)
+                    colocated_1, colocated_2 = compute_colocated_data(*args)
+                    expected_1, expected_2 = brute_force_colocation(*args)
+                    np.testing.assert_allclose(colocated_1, expected_1)
+                    np.testing.assert_allclose(colocated_2, expected_2)
+
+    def test_mid_latitudes(self):
+        self.assert_same_as_brute_force(10, 20)
+
+    def test_small_grid_spacing(self):
+        self.assert_same_as_brute_force(45, -60, spread=0.5)
+
+    def test_antimeridian(self):
+        """Longitude windows split across the antimeridian."""
+        self.assert_same_as_brute_force(0, 179.5)
+        self.assert_same_as_brute_force(-30, -179.8)
+
+    def test_caps_containing_a_pole(self):
+        self.assert_same_as_brute_force(89, 0)
+        self.assert_same_as_brute_force(-88.5, -179)
+
+    def test_no_colocation(self):
+        lon_1, lat_1, lon_2, lat_2, data_1, data_2 = self.grids(10, 20)
+        colocated_1, colocated_2 = compute_colocated_data(
+            lon_1, lat_1, lon_2 + 90, lat_2, data_1, data_2, 1, 0, self.radius_km
+        )
+        self.assertTrue(np.isnan(colocated_1).all())
+        self.assertTrue(np.isnan(colocated_2).all())
+
+
+class TestPolygonMask(unittest.TestCase):
+    """`polygon_mask` and `filter_data_polygon` against `shapely.contains_xy`."""
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        # larger than a tile of `polygon_mask`, so that tiles outside the polygon are skipped
+        shape = (150, 130)
+        self.lon = np.cumsum(rng.uniform(0, 0.2, shape), axis=1) - 10
+        self.lat = np.cumsum(rng.uniform(0, 0.2, shape), axis=0) + rng.uniform(
+            -1, 1, shape
+        )
+        self.lon[5, 7] = np.nan
+        self.lat[100, 3] = np.nan
+        self.data = rng.random(shape + (3,))
+        self.polygon = random_polygon(rng, 0, 12, 6)
+        self.coords = np.asarray(self.polygon.exterior.coords)
+
+    def expected_mask(self):
+        with np.errstate(invalid="ignore"):
+            return shapely.contains_xy(self.polygon, self.lon, self.lat)
+
+    def test_polygon_mask(self):
+        np.testing.assert_array_equal(
+            polygon_mask(self.lon, self.lat, self.coords), self.expected_mask()
+        )
+
+    def test_filter_data_polygon(self):
+        expected = self.expected_mask()
+        rows = np.flatnonzero(expected.any(axis=1))
+        cols = np.flatnonzero(expected.any(axis=0))
+        box = np.s_[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1]
+        data_reduced, lon_reduced, lat_reduced = filter_data_polygon(
+            self.lon, self.lat, self.data.copy(), self.coords
+        )
+        np.testing.assert_array_equal(lon_reduced, self.lon[box])
+        np.testing.assert_array_equal(lat_reduced, self.lat[box])
+        expected_data = np.where(expected[box][..., None], self.data[box], np.nan)
+        np.testing.assert_array_equal(data_reduced, expected_data)
+
+    def test_filter_data_polygon_outside(self):
+        data_reduced, lon_reduced, lat_reduced = filter_data_polygon(
+            self.lon, self.lat, self.data.copy(), self.coords + 100
+        )
+        np.testing.assert_array_equal(data_reduced, self.data)
+        self.assertIsNone(lon_reduced)
+        self.assertIsNone(lat_reduced)
+
+
+class TestRegularGridPolygonMask(unittest.TestCase):
+    """`regular_grid_polygon_mask` and `geometry_edges` against `shapely.contains_xy` on the cell centers."""
+
+    lon_min, lon_res, n_lon = -20.0, 0.25, 160
+    lat_min, lat_res, n_lat = 10.0, 0.2, 150
+
+    def assert_same_as_shapely(self, geometry):
+        row_lo, row_hi, col_lo, col_hi, mask = regular_grid_polygon_mask(
+            self.lon_min,
+            self.lon_res,
+            self.n_lon,
+            self.lat_min,
+            self.lat_res,
+            self.n_lat,
+            *geometry_edges(geometry),
+        )
+        lon = self.lon_min + (np.arange(self.n_lon) + 0.5) * self.lon_res
+        lat = self.lat_min + (np.arange(self.n_lat) + 0.5) * self.lat_res
+        expected = shapely.contains_xy(geometry, *np.meshgrid(lon, lat))
+        full_mask = np.zeros((self.n_lat, self.n_lon), dtype=bool)
+        full_mask[row_lo:row_hi, col_lo:col_hi] = mask
+        np.testing.assert_array_equal(full_mask, expected)
+        # the bounds are those of the cells inside the geometry
+        rows = np.flatnonzero(expected.any(axis=1))
+        cols = np.flatnonzero(expected.any(axis=0))
+        if rows.size:
+            self.assertEqual(
+                (row_lo, row_hi, col_lo, col_hi),
+                (rows[0], rows[-1] + 1, cols[0], cols[-1] + 1),
+            )
+        else:
+            self.assertEqual((row_lo, row_hi, col_lo, col_hi), (0, 0, 0, 0))
+            self.assertEqual(mask.shape, (0, 0))
+
+    def test_random_polygons(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            # some polygons are partly or entirely outside the grid
+            polygon = random_polygon(
+                rng, rng.uniform(-30, 30), rng.uniform(0, 50), rng.uniform(0.5, 15)
+            )
+            self.assert_same_as_shapely(polygon)
+
+    def test_empty(self):
+        self.assert_same_as_shapely(Polygon())
+
+    def test_polygon_with_hole(self):
+        rng = np.random.default_rng(1)
+        exterior = random_polygon(rng, 0, 25, 10, n_vertices=20).exterior
+        hole = random_polygon(rng, 0, 25, 2).exterior
+        self.assert_same_as_shapely(Polygon(exterior, [hole]))
+
+    def test_multipolygon(self):
+        rng = np.random.default_rng(2)
+        self.assert_same_as_shapely(
+            MultiPolygon(
+                [random_polygon(rng, -10, 20, 4), random_polygon(rng, 8, 30, 5)]
+            )
+        )
+
+
+class TestGetNearestEra5Files(unittest.TestCase):
+    """`get_nearest_era5_files` against a search with a date every `step` minutes."""
+
+    resource = "/era5/%Y/%j/era_5-copernicus__%Y%m%d%H.nc"
+
+    @staticmethod
+    def minute_search(start_date, stop_date, resource, step):
+        files = []
+        date = start_date.astype("datetime64[ns]")
+        while date < stop_date:
+            datetime_date = datetime.utcfromtimestamp(date.astype(int) * 1e-9)
+            closest_date, filename = resource_strftime(
+                resource, step=step, date=datetime_date
+            )
+            if filename not in files:
+                files.append(filename)
+            date += np.timedelta64(step, "m")
+        return files
+
+    def assert_same_as_minute_search(self, start_date, stop_date, step):
+        with self.subTest(start_date=start_date, stop_date=stop_date, step=step):
+            self.assertEqual(
+                get_nearest_era5_files(start_date, stop_date, self.resource, step),
+                self.minute_search(start_date, stop_date, self.resource, step),
+            )
+
+    def test_random_windows(self):
+        rng = np.random.default_rng(4)
+        origin = np.datetime64("2020-12-30T00:00:00", "s")
+        # steps dividing 24 hours or not, windows crossing midnight and the end of a year
+        for step in (1, 3, 5, 6, 7, 11, 24):
+            for _ in range(10):
+                offset, duration = rng.integers(0, [4 * 86400, 2 * 86400])
+                start_date = origin + np.timedelta64(int(offset), "s")
+                stop_date = start_date + np.timedelta64(int(duration), "s")
+                self.assert_same_as_minute_search(start_date, stop_date, step)
+
+    def test_midnight(self):
+        for step in (1, 5, 7):
+            self.assert_same_as_minute_search(
+                np.datetime64("2021-03-01T23:10:00"),
+                np.datetime64("2021-03-02T01:20:00"),
+                step,
+            )
+            # stop date before the start date
+            self.assert_same_as_minute_search(
+                np.datetime64("2021-03-02T01:20:00"),
+                np.datetime64("2021-03-01T23:10:00"),
+                step,
+            )
+
+
+class TestMaxWorkers(unittest.TestCase):
+    """Tests for `_max_workers`."""
+
+    def max_workers(self, n_tasks, env_value=None):
+        env = {} if env_value is None else {"COLOC_SAT_MAX_WORKERS": env_value}
+        with mock.patch.dict(os.environ, env):
+            if env_value is None:
+                os.environ.pop("COLOC_SAT_MAX_WORKERS", None)
+            return _max_workers(n_tasks)
+
+    def test_default(self):
+        self.assertEqual(self.max_workers(100), 16)
+        self.assertEqual(self.max_workers(3), 3)
+        self.assertEqual(self.max_workers(0), 1)
+
+    def test_environment_variable(self):
+        self.assertEqual(self.max_workers(100, "4"), 4)
+        for invalid in ("0", "-2", "many"):
+            with self.assertLogs("coloc_sat.tools", "WARNING"):
+                self.assertEqual(self.max_workers(100, invalid), 16)
+
+    def test_dask_worker(self):
+        with mock.patch("coloc_sat.tools._in_dask_worker", return_value=True):
+            self.assertEqual(self.max_workers(100, "8"), 2)
+
+
+class TestHy2NameDates(unittest.TestCase):
+    def test_start_stop_dates_from_name(self):
+        self.assertEqual(
+            _start_stop_dates_from_hy_name(
+                "/data/H2B_OPER_SCA_L2B_OR_20210610T213315_20210610T231528_13225_pwnd.nc"
+            ),
+            (
+                np.datetime64("2021-06-10T21:33:15"),
+                np.datetime64("2021-06-10T23:15:28"),
+            ),
+        )
+        # KNMI filenames only contain the start date
+        self.assertIsNone(
+            _start_stop_dates_from_hy_name(
+                "/data/hscat_20210610_213315_hy_2b__13225_o_250_2204_ovw_l2.nc"
+            )
+        )
+
+
+class TestKeepFilesInTimeRange(unittest.TestCase):
+    """Tests for `keep_files_in_time_range`."""
+
+    def test_keep_overlapping_and_unknown_dates(self):
+        """Files overlapping the time range and files with unknown (NaT) dates are kept."""
+        nat = np.datetime64("NaT")
+        files = ["before", "overlap", "inside", "after", "unknown", "unknown_stop"]
+        dates = [
+            (np.datetime64("2020-01-01T00:00"), np.datetime64("2020-01-01T05:00")),
+            (np.datetime64("2020-01-01T05:00"), np.datetime64("2020-01-01T07:00")),
+            (np.datetime64("2020-01-01T07:00"), np.datetime64("2020-01-01T08:00")),
+            (np.datetime64("2020-01-01T11:00"), np.datetime64("2020-01-01T12:00")),
+            (nat, nat),
+            (np.datetime64("2020-01-01T00:00"), nat),
+        ]
+        kept = keep_files_in_time_range(
+            files,
+            dates,
+            np.datetime64("2020-01-01T06:00"),
+            np.datetime64("2020-01-01T10:00"),
+        )
+        self.assertEqual(kept, ["overlap", "inside", "unknown", "unknown_stop"])
+
+    def test_empty(self):
+        self.assertEqual(
+            keep_files_in_time_range(
+                [], [], np.datetime64("2020-01-01"), np.datetime64("2020-01-02")
+            ),
+            [],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()